@@ -1,51 +1,75 @@
 import uvicorn
-import asyncio
 import sys
 import os
+import time
+import asyncio
 from contextlib import asynccontextmanager, suppress
 
 from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy.exc import IntegrityError
 
-from modules.db import create_db_and_tables, async_session_maker
+from fastapi_users.exceptions import UserAlreadyExists
+from modules.db import migrate_database, migration_head, startup_state, async_session_maker
 from modules.models import User
+from modules.cache import SCHOLARSHIPS_CHANNEL, USERS_CHANNEL, scholarship_cache, user_cache
+from modules.utils.notify import listen
 from modules.schemas import UserCreate, UserRead, UserUpdate
 from modules.users import auth_backend, current_active_user, fastapi_users, google_oauth_client, auth_backend, create_user
-from modules.utils.background_workers import load_scholarships_loop, send_emails_loop
 
 from modules.email_reminders import router as email_reminders_router
 from modules.scholarships import router as scholarships_router
 from modules.organisations import router as orgs_router
 from modules.admin import router as admin_router
+from modules.forms import router as forms_router
 
 FRONTEND_URL = os.getenv('FRONTEND_URL', 'https://stipendify.tk0.eu')
+ADMIN_USER = os.getenv("ADMIN_USER", "admin@example.com")
+ADMIN_PASS = os.getenv("ADMIN_PASS", "Testpass123")
+# "fast" checks the schema version and the admin with one query and only migrates
+# or creates the admin when needed, "full" always does both
+STARTUP_MODE = os.getenv("STARTUP_MODE", "fast")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    await create_db_and_tables()
-    try:
-        async with async_session_maker() as session:
-            await create_user(session, 
-                            os.getenv("ADMIN_USER", "admin@example.com"), 
-                            os.getenv("ADMIN_PASS", "Testpass123"), 
-                            is_superuser=True)
-    except:
-        pass
-    scrape_task = asyncio.create_task(load_scholarships_loop())
-    email_task = asyncio.create_task(send_emails_loop())
-    app.state.scrape_task = scrape_task
-    app.state.email_task = email_task
+    timings = []
+    start = last = time.perf_counter()
+    def phase(name):
+        nonlocal last
+        now = time.perf_counter()
+        timings.append(f"{name} {(now - last) * 1000:.1f} ms")
+        last = now
 
+    if STARTUP_MODE == "full":
+        version, admin_exists = None, False
+    else:
+        version, admin_exists = await startup_state(ADMIN_USER)
+        phase("check")
+    if version != migration_head():
+        await migrate_database()
+        phase("migrate")
+    if not admin_exists:
+        try:
+            async with async_session_maker() as session:
+                await create_user(session, ADMIN_USER, ADMIN_PASS, is_superuser=True)
+        # IntegrityError: another replica created it between the check and the insert
+        except (UserAlreadyExists, IntegrityError):
+            pass
+        phase("admin")
+    # scraping and email reminders run in a separate process (python -m modules.worker)
+    listener = asyncio.create_task(listen({
+        SCHOLARSHIPS_CHANNEL: lambda payload: scholarship_cache.invalidate(),
+        USERS_CHANNEL: lambda payload: user_cache.invalidate(payload or None),
+    }))
+    print(f"startup took {(time.perf_counter() - start) * 1000:.1f} ms ({', '.join(timings)})", file=sys.stderr)
     yield
-
-    email_task.cancel()
-    scrape_task.cancel()
+    listener.cancel()
     with suppress(asyncio.CancelledError):
-        await asyncio.gather(email_task, scrape_task)
+        await listener
 
 app = FastAPI(lifespan=lifespan)
 
-app.add_middleware(CORSMiddleware, allow_origins=[FRONTEND_URL], allow_methods=["GET", "POST", "DELETE", "PUT", "PATCH"], allow_headers=["authorization"], allow_credentials=True)
+app.add_middleware(CORSMiddleware, allow_origins=[FRONTEND_URL], allow_methods=["GET", "POST", "DELETE", "PUT", "PATCH"], allow_headers=["authorization"], expose_headers=["X-Next-Cursor", "ETag"], allow_credentials=True)
 
 app.include_router(
     fastapi_users.get_auth_router(auth_backend), prefix="/auth/jwt", tags=["auth"]
@@ -87,8 +111,13 @@ app.include_router(scholarships_router)
 app.include_router(email_reminders_router)
 app.include_router(orgs_router)
 app.include_router(admin_router)
+app.include_router(forms_router)
 
 
 if __name__ == "__main__":
+    if "--profile-startup" in sys.argv:
+        from modules.utils.profile_startup import profile_imports
+        profile_imports("main")
+        sys.exit()
     uvicorn.run("main:app", host="0.0.0.0", port=5000,
                 forwarded_allow_ips=["stipendify_backend_1", "10.89.1.2", "10.89.0.3", "10.89.17.3"])
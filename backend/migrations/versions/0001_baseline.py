@@ -0,0 +1,265 @@
+"""baseline
+
+The schema as the old create_db_and_tables left it. Every step is guarded, so the
+migration also adopts databases that were created before Alembic.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 08:40:55.901882
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('croatian', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('croatian', coalesce(description, '')), 'B')"
+)
+
+# snowball has no Croatian stemmer, Serbian (latin) is the closest; unaccent
+# first so "Šibenik" and "sibenik" index and search the same
+TEXT_SEARCH = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    """DO $$ BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'croatian') THEN
+            CREATE TEXT SEARCH CONFIGURATION croatian (COPY = serbian);
+            ALTER TEXT SEARCH CONFIGURATION croatian
+                ALTER MAPPING FOR word, hword, hword_part WITH unaccent, serbian_stem;
+        END IF;
+    END $$""",
+]
+
+# columns added to tables that older databases already had
+COLUMNS = [
+    "ALTER TABLE scholarship ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)",
+    "ALTER TABLE user_form ADD COLUMN IF NOT EXISTS matches_computed_at TIMESTAMP WITHOUT TIME ZONE",
+    f"ALTER TABLE scholarship ADD COLUMN IF NOT EXISTS search_vector TSVECTOR "
+    f"GENERATED ALWAYS AS ({SEARCH_VECTOR}) STORED",
+]
+
+# row counts for /admin/stats, kept by statement level triggers so a bulk
+# insert costs one counter update; the counters are seeded once, when missing
+STAT_COUNTERS = [
+    """CREATE OR REPLACE FUNCTION count_rows() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            UPDATE stat_counter SET value = value + (SELECT count(*) FROM new_rows) WHERE name = TG_ARGV[0];
+        ELSE
+            UPDATE stat_counter SET value = value - (SELECT count(*) FROM old_rows) WHERE name = TG_ARGV[0];
+        END IF;
+        RETURN NULL;
+    END $$""",
+    """CREATE OR REPLACE FUNCTION count_scholarships() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            UPDATE stat_counter c SET value = c.value - o.n FROM (
+                SELECT CASE WHEN is_allowed THEN 'active_scholarships' ELSE 'inactive_scholarships' END AS name,
+                       count(*) AS n
+                FROM old_rows GROUP BY 1) o
+            WHERE c.name = o.name;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            UPDATE stat_counter c SET value = c.value + n.n FROM (
+                SELECT CASE WHEN is_allowed THEN 'active_scholarships' ELSE 'inactive_scholarships' END AS name,
+                       count(*) AS n
+                FROM new_rows GROUP BY 1) n
+            WHERE c.name = n.name;
+        END IF;
+        RETURN NULL;
+    END $$""",
+    """CREATE OR REPLACE TRIGGER user_count_insert AFTER INSERT ON "user"
+        REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION count_rows('users')""",
+    """CREATE OR REPLACE TRIGGER user_count_delete AFTER DELETE ON "user"
+        REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION count_rows('users')""",
+    """CREATE OR REPLACE TRIGGER organisation_count_insert AFTER INSERT ON organisation
+        REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION count_rows('orgs')""",
+    """CREATE OR REPLACE TRIGGER organisation_count_delete AFTER DELETE ON organisation
+        REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION count_rows('orgs')""",
+    """CREATE OR REPLACE TRIGGER scholarship_count_insert AFTER INSERT ON scholarship
+        REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION count_scholarships()""",
+    """CREATE OR REPLACE TRIGGER scholarship_count_update AFTER UPDATE ON scholarship
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION count_scholarships()""",
+    """CREATE OR REPLACE TRIGGER scholarship_count_delete AFTER DELETE ON scholarship
+        REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION count_scholarships()""",
+    """INSERT INTO stat_counter (name, value)
+        SELECT 'users', count(*) FROM "user"
+        UNION ALL SELECT 'orgs', count(*) FROM organisation
+        UNION ALL SELECT 'active_scholarships', count(*) FROM scholarship WHERE is_allowed
+        UNION ALL SELECT 'inactive_scholarships', count(*) FROM scholarship WHERE NOT is_allowed
+        ON CONFLICT (name) DO NOTHING""",
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for stmt in TEXT_SEARCH:
+        op.execute(stmt)
+
+    op.create_table('job',
+    sa.Column('id', sa.UUID(), server_default=sa.text('gen_random_uuid()'), nullable=False),
+    sa.Column('kind', sa.String(), nullable=False),
+    sa.Column('run_at', sa.DateTime(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True
+    )
+    op.create_table('organisation',
+    sa.Column('id', sa.UUID(), server_default=sa.text('gen_random_uuid()'), nullable=False),
+    sa.Column('name', sa.Text(), nullable=False),
+    sa.Column('oib', sa.String(length=11), nullable=False),
+    sa.Column('address', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('oib'),
+    if_not_exists=True
+    )
+    op.create_table('stat_counter',
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('value', sa.BigInteger(), server_default=sa.text('0'), nullable=False),
+    sa.PrimaryKeyConstraint('name'),
+    if_not_exists=True
+    )
+    op.create_table('scholarship',
+    sa.Column('id', sa.UUID(), server_default=sa.text('gen_random_uuid()'), nullable=False),
+    sa.Column('name', sa.Text(), nullable=False),
+    sa.Column('value', sa.Integer(), nullable=True),
+    sa.Column('is_allowed', sa.Boolean(), nullable=False),
+    sa.Column('url', sa.Text(), nullable=False),
+    sa.Column('organisation_work', sa.Boolean(), server_default=sa.text('FALSE'), nullable=False),
+    sa.Column('min_grade_average', sa.Numeric(precision=3, scale=2), nullable=True),
+    sa.Column('field_of_study', sa.Text(), nullable=True),
+    sa.Column('type_of_study', sa.Text(), nullable=True),
+    sa.Column('min_year_of_study', sa.Integer(), nullable=True),
+    sa.Column('length_of_scholarship', postgresql.INTERVAL(), nullable=True),
+    sa.Column('length_of_work', postgresql.INTERVAL(), nullable=True),
+    sa.Column('important_dates', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('location', sa.Text(), nullable=True),
+    sa.Column('is_monthly', sa.Boolean(), nullable=False),
+    sa.Column('content_hash', sa.String(length=64), nullable=True),
+    sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed(SEARCH_VECTOR, persisted=True), nullable=True),
+    sa.Column('organisation_id', sa.UUID(), nullable=True),
+    sa.CheckConstraint("type_of_study IS NULL OR type_of_study IN (\n                'Prijediplomski', 'Diplomski',\n                'Stručni',\n                'Poslijediplomski doktorski',\n                'Specijalistički diplomski stručni',\n                'Poslijediplomski specijalistički'\n            )", name='ck_scholarship_type_of_study'),
+    sa.CheckConstraint('min_grade_average >= 1.00 AND min_grade_average <= 5.00', name='ck_scholarship_grades'),
+    sa.CheckConstraint('min_year_of_study IN (0,1,2,3,4,5)', name='ck_scholarship_year_of_study'),
+    sa.CheckConstraint('value > 0', name='ck_scholarship_value'),
+    sa.ForeignKeyConstraint(['organisation_id'], ['organisation.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True
+    )
+    op.create_table('user',
+    sa.Column('first_name', sa.String(), nullable=True),
+    sa.Column('last_name', sa.String(), nullable=True),
+    sa.Column('organisation_id', sa.UUID(), nullable=True),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('email', sa.String(length=320), nullable=False),
+    sa.Column('hashed_password', sa.String(length=1024), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('is_superuser', sa.Boolean(), nullable=False),
+    sa.Column('is_verified', sa.Boolean(), nullable=False),
+    sa.ForeignKeyConstraint(['organisation_id'], ['organisation.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True
+    )
+    op.create_table('email_reminder',
+    sa.Column('id', sa.UUID(), server_default=sa.text('gen_random_uuid()'), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('name', sa.Text(), nullable=True),
+    sa.Column('is_sent', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('remind_at', sa.DateTime(), nullable=False),
+    sa.Column('scholarship_id', sa.UUID(), nullable=False),
+    sa.ForeignKeyConstraint(['scholarship_id'], ['scholarship.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True
+    )
+    op.create_table('oauth_account',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('oauth_name', sa.String(length=100), nullable=False),
+    sa.Column('access_token', sa.String(length=1024), nullable=False),
+    sa.Column('expires_at', sa.Integer(), nullable=True),
+    sa.Column('refresh_token', sa.String(length=1024), nullable=True),
+    sa.Column('account_id', sa.String(length=320), nullable=False),
+    sa.Column('account_email', sa.String(length=320), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='cascade'),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True
+    )
+    op.create_table('scholarship_match',
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('scholarship_id', sa.UUID(), nullable=False),
+    sa.Column('score', sa.Numeric(precision=6, scale=3), nullable=False),
+    sa.ForeignKeyConstraint(['scholarship_id'], ['scholarship.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'scholarship_id'),
+    if_not_exists=True
+    )
+    op.create_table('user_form',
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('city', sa.String(), nullable=True),
+    sa.Column('county', sa.String(), nullable=True),
+    sa.Column('minority', sa.Boolean(), server_default=sa.text('FALSE'), nullable=False),
+    sa.Column('year_of_study', sa.Integer(), nullable=True),
+    sa.Column('field_of_study', sa.Text(), nullable=True),
+    sa.Column('type_of_study', sa.Text(), nullable=True),
+    sa.Column('grade_point_average', sa.Numeric(precision=3, scale=2), nullable=True),
+    sa.Column('sports_category', sa.Integer(), nullable=True),
+    sa.Column('ses', sa.String(), nullable=True),
+    sa.Column('matches_computed_at', sa.DateTime(), nullable=True),
+    sa.CheckConstraint("ses IN ('nizak', 'srednji', 'visok')", name='ck_user_form_ses'),
+    sa.CheckConstraint("type_of_study IN (\n                'Preddiplomski', 'Diplomski', 'Poslijediplomski',\n                'Poslijediplomski specijalistički',\n                'Specijalistički diplomski stručni',\n                'Stručni'\n            )", name='ck_user_form_type_of_study'),
+    sa.CheckConstraint('grade_point_average >= 1.00 AND grade_point_average <= 5.00', name='ck_user_form_gpa'),
+    sa.CheckConstraint('sports_category IN (0,1,2,3,4,5,6)', name='ck_user_form_sports_category'),
+    sa.CheckConstraint('year_of_study IN (0,1,2,3,4,5,6)', name='ck_user_form_year_of_study'),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id'),
+    if_not_exists=True
+    )
+
+    for stmt in COLUMNS:
+        op.execute(stmt)
+
+    op.create_index('ix_job_pending_run_at', 'job', ['run_at'], unique=False, postgresql_where=sa.text('finished_at IS NULL'), if_not_exists=True)
+    op.create_index('ux_job_pending_kind', 'job', ['kind'], unique=True, postgresql_where=sa.text('finished_at IS NULL'), if_not_exists=True)
+    op.create_index('ix_scholarship_allowed_deadline', 'scholarship', [sa.literal_column("coalesce(important_dates ->> 'end_date', '')"), 'id'], unique=False, postgresql_where=sa.text('is_allowed'), if_not_exists=True)
+    op.create_index('ix_scholarship_allowed_location', 'scholarship', ['location'], unique=False, postgresql_where=sa.text('is_allowed'), if_not_exists=True)
+    op.create_index('ix_scholarship_allowed_name', 'scholarship', ['name', 'id'], unique=False, postgresql_where=sa.text('is_allowed'), if_not_exists=True)
+    op.create_index('ix_scholarship_allowed_type_of_study', 'scholarship', ['type_of_study'], unique=False, postgresql_where=sa.text('is_allowed'), if_not_exists=True)
+    op.create_index('ix_scholarship_allowed_value', 'scholarship', [sa.literal_column('coalesce(value, 0)'), 'id'], unique=False, postgresql_where=sa.text('is_allowed'), if_not_exists=True)
+    op.create_index('ix_scholarship_search_vector', 'scholarship', ['search_vector'], unique=False, postgresql_using='gin', if_not_exists=True)
+    op.create_index(op.f('ix_user_email'), 'user', ['email'], unique=True, if_not_exists=True)
+    op.create_index('ix_email_reminder_pending_remind_at', 'email_reminder', ['remind_at'], unique=False, postgresql_where=sa.text('is_sent = false'), if_not_exists=True)
+    op.create_index(op.f('ix_oauth_account_account_id'), 'oauth_account', ['account_id'], unique=False, if_not_exists=True)
+    op.create_index(op.f('ix_oauth_account_oauth_name'), 'oauth_account', ['oauth_name'], unique=False, if_not_exists=True)
+    op.create_index('ix_scholarship_match_scholarship', 'scholarship_match', ['scholarship_id'], unique=False, if_not_exists=True)
+    op.create_index('ix_scholarship_match_user_score', 'scholarship_match', ['user_id', 'score'], unique=False, if_not_exists=True)
+
+    for stmt in STAT_COUNTERS:
+        op.execute(stmt)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_form')
+    op.drop_table('scholarship_match')
+    op.drop_table('oauth_account')
+    op.drop_table('email_reminder')
+    op.drop_table('user')
+    op.drop_table('scholarship')
+    op.drop_table('stat_counter')
+    op.drop_table('organisation')
+    op.drop_table('job')
+    op.execute("DROP FUNCTION IF EXISTS count_rows(), count_scholarships()")
+    op.execute("DROP TEXT SEARCH CONFIGURATION IF EXISTS croatian")
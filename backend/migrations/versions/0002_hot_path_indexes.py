@@ -0,0 +1,44 @@
+"""indexes for the hot query paths
+
+Each index is checked by backend/tests/query_plans.py.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 09:12:03.114025
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # the scraper looks up all scraped urls at once, url IN (...)
+    op.create_index('ix_scholarship_url', 'scholarship', ['url'], unique=False)
+    # one row per scraped page; organisations may post the same url themselves
+    op.create_index('ux_scholarship_scraped_url', 'scholarship', ['url'], unique=True,
+                    postgresql_where=sa.text('content_hash IS NOT NULL'))
+    op.create_index('ix_scholarship_organisation_id', 'scholarship', ['organisation_id'], unique=False)
+    # the admin review queue, a handful of rows in a large table
+    op.create_index('ix_scholarship_unlisted', 'scholarship', ['id'], unique=False,
+                    postgresql_where=sa.text('NOT is_allowed'))
+    op.create_index('ix_email_reminder_user_id', 'email_reminder', ['user_id'], unique=False)
+    op.create_index('ix_email_reminder_scholarship_id', 'email_reminder', ['scholarship_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_email_reminder_scholarship_id', table_name='email_reminder')
+    op.drop_index('ix_email_reminder_user_id', table_name='email_reminder')
+    op.drop_index('ix_scholarship_unlisted', table_name='scholarship')
+    op.drop_index('ix_scholarship_organisation_id', table_name='scholarship')
+    op.drop_index('ux_scholarship_scraped_url', table_name='scholarship')
+    op.drop_index('ix_scholarship_url', table_name='scholarship')
@@ -0,0 +1,32 @@
+"""index for the year_of_study filter of GET /scholarships
+
+The value range filters use ix_scholarship_allowed_value from 0001. Both are
+checked by backend/tests/query_plans.py.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 16:05:41.520318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_scholarship_allowed_min_year', 'scholarship',
+                    [sa.literal_column('coalesce(min_year_of_study, 0)')], unique=False,
+                    postgresql_where=sa.text('is_allowed'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_scholarship_allowed_min_year', table_name='scholarship')
@@ -1,12 +1,14 @@
 import uuid
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from datetime import datetime
+from sqlalchemy import select, func, true
 
-from modules.db import get_async_session
-from modules.models import Scholarship, User, Organisation
+from modules.db import get_async_session, get_read_session, pool_status, replica_status
+from modules.models import EmailReminder, Job, Scholarship, StatCounter, User, Organisation
 from modules.schemas import ScholarshipCreate, ScholarshipRead, ScholarshipUpdate, Statistics
 from modules.users import current_admin_user
+from modules.cache import scholarship_cache, user_cache
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -21,14 +23,71 @@ async def unlisted_scholarships(
     return scholarships
 
 
+def stat_counter(name):
+    return select(StatCounter.value).where(StatCounter.name == name).scalar_subquery()
+
+
+def stat_count(model):
+    return select(func.count()).select_from(model).scalar_subquery()
+
+
 @router.get("/stats", response_model=Statistics)
 async def stats(
+    exact: bool = False,
     user: User = Depends(current_admin_user),
-    session: AsyncSession = Depends(get_async_session),
+    session: AsyncSession = Depends(get_read_session),
 ):
-    db_count = lambda x: select(func.count()).select_from(x)
-    users = (await session.execute(db_count(User))).scalar()
-    orgs = (await session.execute(db_count(Organisation))).scalar()
-    active_scholarships = (await session.execute(db_count(Scholarship).where(Scholarship.is_allowed))).scalar()
-    inactive_scholarships = (await session.execute(db_count(Scholarship).where(Scholarship.is_allowed == False))).scalar()
-    return Statistics(users=users, orgs=orgs, active_scholarships=active_scholarships, inactive_scholarships=inactive_scholarships)
+    """Everything in one round trip. Counts come from stat_counter unless `exact`."""
+    now = datetime.utcnow()
+    reminders = (
+        select(
+            func.count().label("pending_reminders"),
+            func.count().filter(EmailReminder.remind_at <= now).label("overdue_reminders"),
+            func.min(EmailReminder.remind_at).filter(EmailReminder.remind_at <= now)
+            .label("oldest_overdue_reminder"),
+        )
+        .where(EmailReminder.is_sent == False)
+        .subquery()
+    )
+    scrapes = (
+        select(
+            func.max(Job.finished_at).label("last_scrape_at"),
+            func.min(Job.run_at).filter(Job.finished_at.is_(None)).label("next_scrape_at"),
+        )
+        .where(Job.kind == "scrape")
+        .subquery()
+    )
+    last_error = (
+        select(Job.error)
+        .where(Job.kind == "scrape", Job.finished_at.is_not(None))
+        .order_by(Job.finished_at.desc())
+        .limit(1)
+        .scalar_subquery()
+        .label("last_scrape_error")
+    )
+    if exact:
+        scholarships = select(
+            func.count().filter(Scholarship.is_allowed).label("active_scholarships"),
+            func.count().filter(Scholarship.is_allowed == False).label("inactive_scholarships"),
+        ).subquery()
+        counts = [stat_count(User).label("users"), stat_count(Organisation).label("orgs"),
+                  scholarships.c.active_scholarships, scholarships.c.inactive_scholarships]
+        stmt = select(*counts).select_from(scholarships).join(reminders, true())
+    else:
+        counts = [stat_counter(name).label(name)
+                  for name in ("users", "orgs", "active_scholarships", "inactive_scholarships")]
+        stmt = select(*counts).select_from(reminders)
+    stmt = stmt.add_columns(*reminders.c, *scrapes.c, last_error).join(scrapes, true())
+
+    row = (await session.execute(stmt)).one()
+    return Statistics(**row._mapping)
+
+
+@router.get("/cache")
+async def cache_stats(user: User = Depends(current_admin_user)):
+    return {"scholarships": scholarship_cache.stats(), "users": user_cache.stats()}
+
+
+@router.get("/pool")
+async def pool_stats(user: User = Depends(current_admin_user)):
+    return {**pool_status(), "replica": replica_status()}
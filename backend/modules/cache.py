@@ -0,0 +1,203 @@
+import os
+import json
+import time
+import hashlib
+from collections import OrderedDict
+from typing import NamedTuple
+from urllib.parse import urlencode
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+from modules.db import DATABASE_REPLICA_URL, REPLICA_MAX_LAG
+from modules.models import User
+from modules.utils.notify import notify
+
+SCHOLARSHIPS_CHANNEL = "scholarships_changed"
+USERS_CHANNEL = "users_changed"
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    etag: str
+    headers: dict
+    expires: float
+
+
+class ResponseCache:
+    """TTL + LRU cache of already serialized JSON responses.
+
+    Entries are dropped all at once by `invalidate()`. A response computed from
+    data read before an invalidation is not stored, see `generation`. Nor is one
+    computed within `settle` seconds after it, when a lagging replica may still
+    serve the old data.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300, settle: float = 0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.settle = settle
+        self.invalidated_at = None
+        self.entries = OrderedDict()
+        # bumped by every invalidation, read it before querying the database
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.invalidations = 0
+
+    def get(self, key: str) -> CachedResponse | None:
+        entry = self.entries.get(key)
+        if entry is not None and entry.expires < time.monotonic():
+            del self.entries[key]
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: str, content, generation: int, headers: dict | None = None) -> CachedResponse:
+        body = json.dumps(jsonable_encoder(content), ensure_ascii=False, separators=(",", ":")).encode()
+        entry = CachedResponse(
+            body=body,
+            etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+            headers=headers or {},
+            expires=time.monotonic() + self.ttl,
+        )
+        settled = self.invalidated_at is None or time.monotonic() - self.invalidated_at >= self.settle
+        if generation == self.generation and settled:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+        return entry
+
+    def invalidate(self):
+        self.entries.clear()
+        self.generation += 1
+        self.invalidations += 1
+        self.invalidated_at = time.monotonic()
+
+    def respond(self, request: Request, entry: CachedResponse) -> Response:
+        # clients keep their copy but revalidate it, unchanged data costs a 304
+        headers = {**entry.headers, "ETag": entry.etag, "Cache-Control": "no-cache"}
+        tags = [t.strip().removeprefix("W/") for t in request.headers.get("if-none-match", "").split(",")]
+        if entry.etag in tags or "*" in tags:
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(entry.body, media_type="application/json", headers=headers)
+
+    def stats(self) -> dict:
+        requests = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / requests if requests else 0.0,
+            "not_modified": self.not_modified,
+            "invalidations": self.invalidations,
+        }
+
+
+class UserCache:
+    """TTL + LRU cache of the users behind bearer tokens.
+
+    Holds detached copies of the users' columns, relationships are not cached.
+    An entry lives `ttl` seconds at most, and never past the token's expiry.
+    `invalidate(user_id)` drops every token of that user.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 30):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # token -> (user, expires)
+        self.entries = OrderedDict()
+        # bumped by every invalidation, read it before loading the user
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, token: str) -> User | None:
+        entry = self.entries.get(token)
+        if entry is not None and entry[1] < time.monotonic():
+            del self.entries[token]
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(token)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, token: str, user: User, generation: int, token_expires_at: float | None = None):
+        if generation != self.generation:
+            return
+        ttl = self.ttl if token_expires_at is None else min(self.ttl, token_expires_at - time.time())
+        if ttl <= 0:
+            return
+        copy = User(**{attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs})
+        # as if loaded from the database, so session.merge(copy, load=False) takes it as is
+        make_transient_to_detached(copy)
+        self.entries[token] = (copy, time.monotonic() + ttl)
+        self.entries.move_to_end(token)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def invalidate(self, user_id: str | None = None):
+        """Drops the entries of `user_id`, or all of them."""
+        if user_id is None:
+            self.entries.clear()
+        else:
+            for token in [t for t, (user, _) in self.entries.items() if str(user.id) == user_id]:
+                del self.entries[token]
+        self.generation += 1
+        self.invalidations += 1
+
+    def stats(self) -> dict:
+        requests = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / requests if requests else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+
+def cache_key(request: Request) -> str:
+    return f"{request.url.path}?{urlencode(sorted(request.query_params.multi_items()))}"
+
+
+scholarship_cache = ResponseCache(
+    maxsize=int(os.getenv("SCHOLARSHIP_CACHE_SIZE", 1024)),
+    ttl=float(os.getenv("SCHOLARSHIP_CACHE_TTL", 300)),
+    settle=REPLICA_MAX_LAG if DATABASE_REPLICA_URL else 0,
+)
+
+user_cache = UserCache(
+    maxsize=int(os.getenv("USER_CACHE_SIZE", 1024)),
+    ttl=float(os.getenv("USER_CACHE_TTL", 30)),
+)
+
+
+async def commit_scholarship_changes(session):
+    """Commits and drops cached scholarship responses in every API process."""
+    await notify(session, SCHOLARSHIPS_CHANNEL)
+    await session.commit()
+    # the notification reaches this process too, but only after a round trip
+    scholarship_cache.invalidate()
+
+
+async def commit_user_changes(session, user_id):
+    """Drops the cached user in every API process, the changes are already committed."""
+    await notify(session, USERS_CHANNEL, str(user_id))
+    await session.commit()
+    user_cache.invalidate(str(user_id))
@@ -9,6 +9,7 @@ from modules.models import EmailReminder, User
 from modules.schemas import EmailReminderCreate, EmailReminderRead, EmailReminderDelete
 from modules.users import current_active_user  
 from modules.time_utils import to_utc_naive
+from modules.reminder_scheduler import notify_reminder_added, notify_reminder_removed
 
 router = APIRouter(prefix="/email-reminders", tags=["email-reminders"])
 
@@ -27,6 +28,8 @@ async def create_email_reminder(
         is_sent=False,
     )
     session.add(reminder)
+    await session.flush()
+    await notify_reminder_added(session, reminder)
     await session.commit()
     await session.refresh(reminder)
     return reminder
@@ -49,6 +52,7 @@ async def delete_email_reminder(
 ):
     stmt = delete(EmailReminder).where(EmailReminder.id == payload.id)
     await session.execute(stmt)
+    await notify_reminder_removed(session, payload.id)
     await session.commit()
 
     return "OK"
@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from modules.db import get_async_session
+from modules.models import User, UserForm
+from modules.schemas import UserFormBase, UserFormRead
+from modules.users import current_active_user
+from modules.matching import invalidate_user_matches
+
+router = APIRouter(prefix="/form", tags=["form"])
+
+
+@router.get("", response_model=UserFormRead)
+async def get_form(
+    user: User = Depends(current_active_user),
+    session: AsyncSession = Depends(get_async_session),
+):
+    form = await session.get(UserForm, user.id)
+    if not form:
+        raise HTTPException(status_code=404, detail="Form not filled in")
+    return form
+
+
+@router.put("", response_model=UserFormRead)
+async def put_form(
+    data: UserFormBase,
+    user: User = Depends(current_active_user),
+    session: AsyncSession = Depends(get_async_session),
+):
+    form = await session.get(UserForm, user.id)
+    if not form:
+        form = UserForm(user_id=user.id)
+        session.add(form)
+    for field, value in data.model_dump().items():
+        setattr(form, field, value)
+    await session.flush()
+    await invalidate_user_matches(session, user.id)
+    await session.commit()
+    await session.refresh(form)
+    return form
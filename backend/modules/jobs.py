@@ -0,0 +1,81 @@
+import os
+import sys
+from datetime import datetime, timedelta
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+
+from modules.db import async_session_maker
+from modules.models import Job
+
+# a started job another worker has not finished within this long is run again
+LEASE = timedelta(seconds=int(os.getenv("JOB_LEASE_SECONDS", "3600")))
+# finished jobs are kept this long for inspection
+RETENTION = timedelta(days=int(os.getenv("JOB_RETENTION_DAYS", "30")))
+
+
+async def schedule_job(kind: str, run_at: datetime | None = None):
+    """Queues a job of the given kind unless one is already pending."""
+    async with async_session_maker() as session:
+        await session.execute(
+            insert(Job)
+            .values(kind=kind, run_at=run_at or datetime.utcnow())
+            .on_conflict_do_nothing(
+                index_elements=[Job.kind],
+                index_where=Job.finished_at.is_(None))
+        )
+        await session.commit()
+
+
+async def run_next_job(handlers: dict) -> bool:
+    """Claims one due job, runs it and queues its next run.
+
+    `handlers` maps a job kind to `(coroutine function, interval)`. A job is
+    claimed by setting started_at in a short transaction (`FOR UPDATE SKIP
+    LOCKED`), which leases it to this worker for LEASE, so no connection or
+    row lock is held while it runs. If the worker dies, the job is claimed
+    again once the lease is over. The result is recorded in a second
+    transaction, which also deletes jobs finished more than RETENTION ago.
+    Returns False if no job was due.
+    """
+    async with async_session_maker() as session:
+        now = datetime.utcnow()
+        stmt = (
+            select(Job)
+            .where(Job.finished_at.is_(None))
+            .where(Job.run_at <= now)
+            .where(or_(Job.started_at.is_(None), Job.started_at < now - LEASE))
+            .where(Job.kind.in_(handlers))
+            .order_by(Job.run_at)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        job = (await session.scalars(stmt)).first()
+        if job is None:
+            return False
+        id, kind = job.id, job.kind
+        job.started_at = started_at = now
+        await session.commit()
+
+    run, interval = handlers[kind]
+    print(f"Running job {kind} ({id})", file=sys.stderr)
+    error = None
+    try:
+        await run()
+    except Exception as e:
+        print(f"Job {kind} failed ({type(e)}): {e}", file=sys.stderr)
+        error = f"{type(e).__name__}: {e}"
+
+    async with async_session_maker() as session:
+        finished_at = datetime.utcnow()
+        finished = await session.execute(
+            update(Job)
+            .where(Job.id == id, Job.started_at == started_at, Job.finished_at.is_(None))
+            .values(finished_at=finished_at, error=error))
+        if finished.rowcount:
+            session.add(Job(kind=kind, run_at=started_at + interval))
+        else:
+            # the lease ran out and the job was claimed again
+            print(f"Job {kind} ({id}) was taken over by another worker", file=sys.stderr)
+        await session.execute(delete(Job).where(Job.finished_at < finished_at - RETENTION))
+        await session.commit()
+    return True
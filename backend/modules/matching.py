@@ -0,0 +1,100 @@
+import uuid
+from datetime import datetime
+from sqlalchemy import and_, case, cast, delete, func, or_, select, update
+from sqlalchemy.dialects.postgresql import REGCONFIG, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from modules.models import Scholarship, ScholarshipMatch, UserForm
+
+# user_form and scholarship name two study types differently
+STUDY_TYPE = case(
+    (UserForm.type_of_study == "Preddiplomski", "Prijediplomski"),
+    (UserForm.type_of_study == "Poslijediplomski", "Poslijediplomski doktorski"),
+    else_=UserForm.type_of_study,
+)
+
+LOCATION_MATCH = or_(
+    func.lower(Scholarship.location) == func.lower(UserForm.city),
+    func.lower(Scholarship.location) == func.lower(UserForm.county),
+)
+FIELD_MATCH = func.lower(Scholarship.field_of_study) == func.lower(UserForm.field_of_study)
+TYPE_MATCH = Scholarship.type_of_study == STUDY_TYPE
+GRADE_MATCH = UserForm.grade_point_average >= Scholarship.min_grade_average
+YEAR_MATCH = UserForm.year_of_study >= Scholarship.min_year_of_study
+# need based scholarships name the social status or means of the applicant
+# among their criteria, they are not only for them, so this only ranks
+NEED_BASED = Scholarship.search_vector.op("@@")(func.websearch_to_tsquery(
+    cast("croatian", REGCONFIG), '"socijalni status" or "imovinsko stanje"'))
+NEED_MATCH = and_(UserForm.ses == "nizak", NEED_BASED)
+
+# a requirement only rules a scholarship out if the user filled in that part of the form
+ELIGIBLE = and_(
+    Scholarship.is_allowed,
+    or_(Scholarship.min_grade_average.is_(None), UserForm.grade_point_average.is_(None), GRADE_MATCH),
+    or_(Scholarship.min_year_of_study.is_(None), UserForm.year_of_study.is_(None), YEAR_MATCH),
+    or_(Scholarship.type_of_study.is_(None), UserForm.type_of_study.is_(None), TYPE_MATCH),
+    or_(Scholarship.field_of_study.is_(None), UserForm.field_of_study.is_(None), FIELD_MATCH),
+    or_(Scholarship.location.is_(None),
+        and_(UserForm.city.is_(None), UserForm.county.is_(None)), LOCATION_MATCH),
+)
+
+# targeted scholarships rank above generic ones, higher value breaks ties
+SCORE = (
+    case((LOCATION_MATCH, 3), else_=0)
+    + case((FIELD_MATCH, 3), else_=0)
+    + case((TYPE_MATCH, 2), else_=0)
+    + case((GRADE_MATCH, 1), else_=0)
+    + case((YEAR_MATCH, 1), else_=0)
+    + case((NEED_MATCH, 2), else_=0)
+    + func.least(func.coalesce(Scholarship.value, 0), 1000) / 1000.0
+)
+
+
+def match_select(*where):
+    return (
+        select(UserForm.user_id, Scholarship.id, SCORE)
+        .select_from(UserForm)
+        .join(Scholarship, ELIGIBLE)
+        .where(*where)
+    )
+
+
+def insert_matches(*where):
+    return (
+        insert(ScholarshipMatch)
+        .from_select(["user_id", "scholarship_id", "score"], match_select(*where))
+        .on_conflict_do_nothing()
+    )
+
+
+async def ensure_user_matches(session: AsyncSession, form: UserForm):
+    """Fills the user's match cache if it is missing, in a single INSERT ... SELECT."""
+    if form.matches_computed_at is not None:
+        return
+    await session.execute(
+        delete(ScholarshipMatch).where(ScholarshipMatch.user_id == form.user_id))
+    await session.execute(insert_matches(UserForm.user_id == form.user_id))
+    form.matches_computed_at = datetime.utcnow()
+    await session.commit()
+
+
+async def invalidate_user_matches(session: AsyncSession, user_id: uuid.UUID):
+    await session.execute(
+        delete(ScholarshipMatch).where(ScholarshipMatch.user_id == user_id))
+    await session.execute(
+        update(UserForm).where(UserForm.user_id == user_id).values(matches_computed_at=None))
+
+
+async def refresh_scholarship_matches(session: AsyncSession, scholarship_id: uuid.UUID):
+    """Recomputes one scholarship's matches for every user with a filled cache."""
+    await session.execute(
+        delete(ScholarshipMatch).where(ScholarshipMatch.scholarship_id == scholarship_id))
+    await session.execute(insert_matches(
+        Scholarship.id == scholarship_id, UserForm.matches_computed_at.is_not(None)))
+
+
+async def invalidate_all_matches(session: AsyncSession):
+    # caches are rebuilt lazily, per user, on their next /scholarships/for-me
+    await session.execute(
+        update(UserForm).where(UserForm.matches_computed_at.is_not(None))
+        .values(matches_computed_at=None))
@@ -7,18 +7,22 @@ from fastapi_users.db import (
     SQLAlchemyBaseUserTableUUID,
 )
 from sqlalchemy import (
+    BigInteger,
     Boolean,
     CheckConstraint,
     Column,
+    Computed,
     ForeignKey,
+    Index,
     Integer,
     Numeric,
     String,
     Text,
+    func,
     text,
 )
-from sqlalchemy.dialects.postgresql import UUID, JSONB, INTERVAL
-from sqlalchemy.orm import declarative_base, relationship
+from sqlalchemy.dialects.postgresql import UUID, JSONB, INTERVAL, TSVECTOR
+from sqlalchemy.orm import declarative_base, deferred, relationship
 
 Base = declarative_base()
 
@@ -56,8 +60,9 @@ class User(SQLAlchemyBaseUserTableUUID, Base):
     )
     organisation = relationship("Organisation", back_populates="user")
 
+    # ne ucitava se uz svakog korisnika, samo u OAuth prijavi (modules.db.UserDatabase)
     oauth_accounts = relationship(
-        "OAuthAccount", lazy="joined",
+        "OAuthAccount",
         cascade="all, delete-orphan",
     )
 
@@ -114,6 +119,8 @@ class UserForm(Base):
     grade_point_average = Column(Numeric(3, 2), nullable=True)
     sports_category = Column(Integer, nullable=True)
     ses = Column("ses", String, nullable=True)
+    # NULL dok preporuke (scholarship_match) nisu izracunate ili su zastarjele
+    matches_computed_at = Column(DateTime, nullable=True)
 
     __table_args__ = (
         CheckConstraint(
@@ -146,6 +153,13 @@ class UserForm(Base):
     user = relationship("User", back_populates="form")
 
 
+# tezine: naziv (A) je vazniji od opisa (B); konfiguracija croatian je u TEXT_SEARCH iz migrations/versions/0001_baseline.py
+SCHOLARSHIP_SEARCH_VECTOR = (
+    "setweight(to_tsvector('croatian', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('croatian', coalesce(description, '')), 'B')"
+)
+
+
 class Scholarship(Base):
     __tablename__ = "scholarship"
 
@@ -170,6 +184,10 @@ class Scholarship(Base):
     description = Column(Text, nullable=True)
     location = Column(Text, nullable=True)
     is_monthly = Column(Boolean, nullable=False, default=False)
+    # otisak sadrzaja za stipendije dohvacene scraperom, NULL za rucno unesene
+    content_hash = Column(String(64), nullable=True)
+    # za pretrazivanje, racuna ga baza; ne ucitava se s ostatkom retka
+    search_vector = deferred(Column(TSVECTOR, Computed(SCHOLARSHIP_SEARCH_VECTOR, persisted=True)))
 
     organisation_id = Column(
         UUID(as_uuid=True),
@@ -203,6 +221,36 @@ class Scholarship(Base):
     )
     email_reminders = relationship("EmailReminder", back_populates="scholarship")
     organisation = relationship("Organisation", back_populates="scholarships")
+
+
+# indeksi za GET /scholarships (filtri i keyset paginacija po sortiranom stupcu)
+SCHOLARSHIP_DEADLINE = func.coalesce(Scholarship.important_dates["end_date"].astext, "")
+SCHOLARSHIP_VALUE = func.coalesce(Scholarship.value, 0)
+# bez najmanje godine studija stipendija je dostupna od nulte godine
+SCHOLARSHIP_MIN_YEAR = func.coalesce(Scholarship.min_year_of_study, 0)
+
+Index("ix_scholarship_allowed_name", Scholarship.name, Scholarship.id,
+      postgresql_where=text("is_allowed"))
+Index("ix_scholarship_allowed_value", SCHOLARSHIP_VALUE, Scholarship.id,
+      postgresql_where=text("is_allowed"))
+Index("ix_scholarship_allowed_deadline", SCHOLARSHIP_DEADLINE, Scholarship.id,
+      postgresql_where=text("is_allowed"))
+Index("ix_scholarship_allowed_location", Scholarship.location,
+      postgresql_where=text("is_allowed"))
+Index("ix_scholarship_allowed_type_of_study", Scholarship.type_of_study,
+      postgresql_where=text("is_allowed"))
+Index("ix_scholarship_allowed_min_year", SCHOLARSHIP_MIN_YEAR,
+      postgresql_where=text("is_allowed"))
+Index("ix_scholarship_search_vector", Scholarship.search_vector, postgresql_using="gin")
+
+# scraper trazi sve postojece url-ove odjednom; svaka scrapana stranica je jedan red
+Index("ix_scholarship_url", Scholarship.url)
+Index("ux_scholarship_scraped_url", Scholarship.url, unique=True,
+      postgresql_where=text("content_hash IS NOT NULL"))
+Index("ix_scholarship_organisation_id", Scholarship.organisation_id)
+# admin pregled neodobrenih stipendija
+Index("ix_scholarship_unlisted", Scholarship.id, postgresql_where=text("NOT is_allowed"))
+
 class EmailReminder(Base):
     __tablename__= "email_reminder"
     id = Column( 
@@ -230,3 +278,68 @@ class EmailReminder(Base):
     )
 
     scholarship = relationship("Scholarship", back_populates="email_reminders")
+
+
+# samo neposlani podsjetnici, indeks ostaje malen koliko god poslanih bilo
+Index("ix_email_reminder_pending_remind_at", EmailReminder.remind_at,
+      postgresql_where=text("is_sent = false"))
+Index("ix_email_reminder_user_id", EmailReminder.user_id)
+Index("ix_email_reminder_scholarship_id", EmailReminder.scholarship_id)
+
+
+class Job(Base):
+    # periodicki poslovi koje izvrsava modules.worker
+    __tablename__ = "job"
+
+    id = Column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        server_default=text("gen_random_uuid()"),
+    )
+    kind = Column(String, nullable=False)
+    run_at = Column(DateTime, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    error = Column(Text, nullable=True)
+
+    __table_args__ = (
+        # najvise jedan posao iste vrste ceka na izvrsavanje
+        Index(
+            "ux_job_pending_kind",
+            "kind",
+            unique=True,
+            postgresql_where=text("finished_at IS NULL"),
+        ),
+        Index("ix_job_pending_run_at", "run_at",
+              postgresql_where=text("finished_at IS NULL")),
+    )
+
+
+class ScholarshipMatch(Base):
+    # materijalizirane preporuke stipendija za korisnika (GET /scholarships/for-me)
+    __tablename__ = "scholarship_match"
+
+    user_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("user.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    scholarship_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("scholarship.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    score = Column(Numeric(6, 3), nullable=False)
+
+    __table_args__ = (
+        Index("ix_scholarship_match_user_score", "user_id", "score"),
+        Index("ix_scholarship_match_scholarship", "scholarship_id"),
+    )
+
+
+class StatCounter(Base):
+    # brojaci za /admin/stats, odrzavaju ih okidaci iz STAT_COUNTERS u migrations/versions/0001_baseline.py
+    __tablename__ = "stat_counter"
+
+    name = Column(String, primary_key=True)
+    value = Column(BigInteger, nullable=False, server_default=text("0"))
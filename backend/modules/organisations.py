@@ -4,7 +4,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from sqlalchemy import select
 
-from modules.db import get_async_session
+from modules.db import get_async_session, get_read_session
 from modules.models import User, Organisation, Scholarship
 from modules.schemas import OrganisationCreate, OrganisationRead, ScholarshipRead, UserRead
 from modules.users import current_org_user, create_user
@@ -72,7 +72,7 @@ async def get_me(
 @router.get("/{organisation_id}", response_model=OrganisationRead)
 async def get_org(
     org_id: uuid.UUID,
-    session: AsyncSession = Depends(get_async_session),
+    session: AsyncSession = Depends(get_read_session),
 ):
     stmt = (
         select(Organisation)
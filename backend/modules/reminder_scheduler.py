@@ -0,0 +1,138 @@
+import os
+import sys
+import time
+import uuid
+import heapq
+import asyncio
+from contextlib import suppress
+from datetime import datetime, timedelta
+from sqlalchemy import select
+
+from modules.db import async_session_maker
+from modules.models import EmailReminder
+from modules.utils.notify import notify
+
+REMINDERS_CHANNEL = "email_reminders_changed"
+SCHEDULER_SIZE = int(os.getenv("REMINDER_SCHEDULER_SIZE", "1000"))
+# safety net for reminders that were rejected by Mailjet or missed otherwise
+RELOAD_SECONDS = int(os.getenv("REMINDER_RELOAD_SECONDS", "3600"))
+# a reminder that could not be sent is retried after this long
+RETRY_SECONDS = int(os.getenv("REMINDER_RETRY_SECONDS", "900"))
+# least time between two loads of the table
+MIN_RELOAD_SECONDS = 5
+
+
+async def notify_reminder_added(session, reminder: EmailReminder):
+    await notify(session, REMINDERS_CHANNEL, f"add {reminder.id} {reminder.remind_at.isoformat()}")
+
+
+async def notify_reminder_removed(session, id: uuid.UUID):
+    await notify(session, REMINDERS_CHANNEL, f"remove {id}")
+
+
+class ReminderScheduler:
+    """Sleeps until the next unsent reminder is due, then calls `send()`.
+
+    The next `size` reminders are kept in a heap ordered by remind_at. The
+    table is only read at start, when the heap runs dry while more reminders
+    wait past it, after a listener reconnect and every RELOAD_SECONDS; in
+    between the heap follows the notifications sent by the API (`on_notify`).
+    `send` claims due rows itself, so several schedulers can run at once,
+    and returns the ids it could not send. Those are left out of the heap
+    and of `send` until RETRY_SECONDS later, so reminders Mailjet keeps
+    rejecting do not crowd out the rest.
+    """
+
+    def __init__(self, send, size: int = SCHEDULER_SIZE):
+        self.send = send
+        self.size = size
+        self.heap = []
+        # id -> remind_at, heap entries missing here were removed
+        self.pending = {}
+        # reminders after this were not loaded, None if all of them were
+        self.horizon = None
+        self.loaded_at = None
+        # loaded_at is reset to ask for a load, this is when the last one was
+        self.last_load = None
+        # id -> when a reminder that could not be sent is tried again
+        self.retry_at = {}
+        self.wakeup = asyncio.Event()
+
+    async def load(self):
+        if self.last_load is not None:
+            await asyncio.sleep(self.last_load + MIN_RELOAD_SECONDS - time.monotonic())
+        self.expire_retries(datetime.utcnow())
+        async with async_session_maker() as session:
+            rows = (await session.execute(
+                select(EmailReminder.id, EmailReminder.remind_at)
+                .where(EmailReminder.is_sent == False)
+                .where(EmailReminder.id.not_in(self.retry_at))
+                .order_by(EmailReminder.remind_at)
+                .limit(self.size))).all()
+        self.pending = {id: remind_at for id, remind_at in rows}
+        self.heap = [(remind_at, id) for id, remind_at in rows]
+        heapq.heapify(self.heap)
+        self.horizon = rows[-1][1] if len(rows) == self.size else None
+        self.loaded_at = self.last_load = time.monotonic()
+        for id, at in self.retry_at.items():
+            self.add(id, at)
+        print(f"Scheduled {len(rows)} reminders", file=sys.stderr)
+
+    def expire_retries(self, now: datetime):
+        self.retry_at = {id: at for id, at in self.retry_at.items() if at > now}
+
+    def add(self, id: uuid.UUID, remind_at: datetime):
+        if self.horizon is not None and remind_at > self.horizon:
+            return
+        self.pending[id] = remind_at
+        heapq.heappush(self.heap, (remind_at, id))
+        self.wakeup.set()
+
+    def remove(self, id: uuid.UUID):
+        self.pending.pop(id, None)
+
+    def on_notify(self, payload: str | None):
+        if payload is None:
+            # (re)connected, whatever happened meanwhile is only in the table
+            self.loaded_at = None
+        else:
+            action, id, *remind_at = payload.split()
+            if action == "add":
+                self.add(uuid.UUID(id), datetime.fromisoformat(remind_at[0]))
+            else:
+                self.remove(uuid.UUID(id))
+        self.wakeup.set()
+
+    def next_due(self) -> datetime | None:
+        while self.heap and self.pending.get(self.heap[0][1]) != self.heap[0][0]:
+            heapq.heappop(self.heap)
+        return self.heap[0][0] if self.heap else None
+
+    async def run(self):
+        while True:
+            if self.loaded_at is None or time.monotonic() - self.loaded_at > RELOAD_SECONDS:
+                await self.load()
+            self.wakeup.clear()
+
+            due = self.next_due()
+            if due is None and self.horizon is not None:
+                # went through the loaded ones, more are waiting in the table
+                self.loaded_at = None
+                continue
+            now = datetime.utcnow()
+            if due is not None and due <= now:
+                self.expire_retries(now)
+                failed = await self.send(skip=list(self.retry_at))
+                while self.heap and self.heap[0][0] <= now:
+                    self.pending.pop(heapq.heappop(self.heap)[1], None)
+                retry_at = now + timedelta(seconds=RETRY_SECONDS)
+                for id in failed:
+                    self.retry_at[id] = retry_at
+                    self.add(id, retry_at)
+                continue
+
+            timeout = RELOAD_SECONDS - (time.monotonic() - self.loaded_at)
+            if due is not None:
+                timeout = min(timeout, (due - now).total_seconds())
+            with suppress(TimeoutError):
+                await asyncio.wait_for(self.wakeup.wait(), max(timeout, 0))
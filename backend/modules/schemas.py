@@ -78,6 +78,54 @@ class ScholarshipRead(ScholarshipBase):
     id: uuid.UUID
     organisation_id: Optional[uuid.UUID] = None
 
+class ScholarshipQuery(BaseModel):
+    location: Optional[str] = None
+    type_of_study: Optional[StudyType] = None
+    # stipendije dostupne studentima te godine studija
+    year_of_study: Optional[int] = Field(None, ge=0, le=6)
+    min_value: Optional[int] = None
+    max_value: Optional[int] = None
+    deadline_after: Optional[datetime] = None
+    deadline_before: Optional[datetime] = None
+    sort: Literal["name", "-name", "value", "-value", "deadline", "-deadline"] = "name"
+    limit: Optional[int] = Field(None, ge=1, le=500)
+    cursor: Optional[str] = None
+    # comma separated ScholarshipRead fields, e.g. "name,value,location"
+    fields: Optional[str] = None
+
+
+class ScholarshipMatchRead(ScholarshipRead):
+    score: float
+
+
+class ScholarshipSearchResult(ScholarshipRead):
+    rank: float
+    # naziv i isjecci opisa s pogocima oznacenim s <mark></mark>
+    name_highlight: str
+    description_highlight: str
+
+
+class UserFormBase(BaseModel):
+    city: Optional[str] = None
+    county: Optional[str] = None
+    minority: bool = False
+    year_of_study: Optional[Literal[0, 1, 2, 3, 4, 5, 6]] = None
+    field_of_study: Optional[str] = None
+    type_of_study: Optional[Literal[
+        'Preddiplomski', 'Diplomski', 'Poslijediplomski',
+        'Poslijediplomski specijalistički',
+        'Specijalistički diplomski stručni',
+        'Stručni']] = None
+    grade_point_average: Optional[float] = Field(None, ge=1.00, le=5.00)
+    sports_category: Optional[Literal[0, 1, 2, 3, 4, 5, 6]] = None
+    ses: Optional[Literal['nizak', 'srednji', 'visok']] = None
+
+    class Config:
+        from_attributes = True
+
+class UserFormRead(UserFormBase):
+    user_id: uuid.UUID
+
 
 class OrganisationCreate(BaseModel):
     name: str
@@ -132,6 +180,13 @@ class Statistics(BaseModel):
     orgs: int
     active_scholarships: int
     inactive_scholarships: int
+    # neposlani podsjetnici, od toga dospjeli i najstariji dospjeli
+    pending_reminders: int = 0
+    overdue_reminders: int = 0
+    oldest_overdue_reminder: Optional[datetime] = None
+    last_scrape_at: Optional[datetime] = None
+    last_scrape_error: Optional[str] = None
+    next_scrape_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
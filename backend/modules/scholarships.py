@@ -1,27 +1,225 @@
+import html
 import uuid
-from fastapi import APIRouter, Depends, HTTPException, status
+import json
+import base64
+from typing import Annotated
+from pydantic import TypeAdapter
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from fastapi.responses import RedirectResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import cast, func, select, or_, tuple_
+from sqlalchemy.dialects.postgresql import REGCONFIG
 from datetime import datetime
-from textwrap import shorten
 
-from modules.db import get_async_session
-from modules.models import Scholarship, User
-from modules.schemas import ScholarshipCreate, ScholarshipRead, ScholarshipUpdate
-from modules.users import current_org_user
-from modules.utils.gcal_url_generator import generate_url
+from modules.db import get_async_session, get_read_session
+from modules.cache import cache_key, commit_scholarship_changes, scholarship_cache
+from modules.models import (
+    Scholarship, ScholarshipMatch, User, UserForm,
+    SCHOLARSHIP_DEADLINE, SCHOLARSHIP_MIN_YEAR, SCHOLARSHIP_VALUE,
+)
+from modules.schemas import (
+    ScholarshipCreate, ScholarshipMatchRead, ScholarshipQuery, ScholarshipRead,
+    ScholarshipSearchResult, ScholarshipUpdate,
+)
+from modules.users import current_active_user, current_org_user
+from modules.matching import ensure_user_matches, refresh_scholarship_matches
+from modules.utils.gcal_url_generator import scholarship_url
 
 router = APIRouter(prefix="/scholarships", tags=["scholarships"])
 
 
+SORT_KEYS = {
+    "name": Scholarship.name,
+    "value": SCHOLARSHIP_VALUE,
+    "deadline": SCHOLARSHIP_DEADLINE,
+}
+# type of each sort key's values, as they come back in a cursor
+SORT_TYPES = {"name": str, "value": int, "deadline": str}
+# a projected row is not a whole ScholarshipRead, so its columns are validated one by one
+FIELD_ADAPTERS = {name: TypeAdapter(field.annotation) for name, field in ScholarshipRead.model_fields.items()}
+
+SEARCH_CONFIG = cast("croatian", REGCONFIG)
+# ts_headline copies the text as it is, so hits are marked with characters
+# that cannot be HTML and turned into <mark> after the text is escaped
+START_SEL, STOP_SEL = "\ue000", "\ue001"
+HIGHLIGHT = f'StartSel="{START_SEL}", StopSel="{STOP_SEL}"'
+
+
+def filter_scholarships(stmt, q: ScholarshipQuery):
+    if q.location is not None:
+        stmt = stmt.where(Scholarship.location == q.location)
+    if q.type_of_study is not None:
+        stmt = stmt.where(Scholarship.type_of_study == q.type_of_study.value)
+    # filters on the indexed coalesce expressions, see models.py
+    if q.year_of_study is not None:
+        stmt = stmt.where(SCHOLARSHIP_MIN_YEAR <= q.year_of_study)
+    # scholarships of unknown value match no value range
+    if q.min_value is not None or q.max_value is not None:
+        stmt = stmt.where(Scholarship.value.is_not(None))
+    if q.min_value is not None:
+        stmt = stmt.where(SCHOLARSHIP_VALUE >= q.min_value)
+    if q.max_value is not None:
+        stmt = stmt.where(SCHOLARSHIP_VALUE <= q.max_value)
+    # end_date is stored as an ISO string, which sorts like the date itself;
+    # it is usually a bare date, so deadline_after compares dates and keeps that day
+    if q.deadline_after is not None:
+        stmt = stmt.where(SCHOLARSHIP_DEADLINE >= q.deadline_after.date().isoformat())
+    if q.deadline_before is not None:
+        stmt = stmt.where(SCHOLARSHIP_DEADLINE != "",
+                          SCHOLARSHIP_DEADLINE <= q.deadline_before.isoformat())
+    return stmt
+
+
+def projected_fields(fields: str | None):
+    if fields is None:
+        return None
+    names = ["id"] + [f.strip() for f in fields.split(",") if f.strip() and f.strip() != "id"]
+    unknown = [f for f in names if f not in ScholarshipRead.model_fields]
+    if unknown:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"Unknown fields: {', '.join(unknown)}")
+    return names
+
+
+def highlighted(headline: str) -> str:
+    return html.escape(headline).replace(START_SEL, "<mark>").replace(STOP_SEL, "</mark>")
+
+
+def projected_row(fields: list[str], row) -> dict:
+    values = {f: FIELD_ADAPTERS[f].validate_python(v) for f, v in zip(fields, row)}
+    return ScholarshipRead.model_construct(**values).model_dump(mode="json", include=set(fields))
+
+
+def encode_cursor(sort: str, sort_value, id: uuid.UUID) -> str:
+    return base64.urlsafe_b64encode(json.dumps([sort, sort_value, str(id)]).encode()).decode()
+
+
+def decode_cursor(cursor: str, sort: str):
+    """`(sort value, id)` of a cursor made for `sort`, 400 for any other."""
+    try:
+        cursor_sort, sort_value, id = json.loads(base64.urlsafe_b64decode(cursor))
+        id = uuid.UUID(id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    sort_type = SORT_TYPES[sort.lstrip("-")]
+    if (cursor_sort != sort or not isinstance(sort_value, sort_type)
+            or isinstance(sort_value, bool)):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"Cursor does not belong to sort={sort}")
+    return sort_value, id
+
+
+async def query_scholarships(session: AsyncSession, q: ScholarshipQuery):
+    fields = projected_fields(q.fields)
+    descending = q.sort.startswith("-")
+    sort_key = SORT_KEYS[q.sort.lstrip("-")]
+
+    columns = [Scholarship] if fields is None else [getattr(Scholarship, f) for f in fields]
+    stmt = filter_scholarships(
+        select(*columns, sort_key.label("sort_key"), Scholarship.id.label("cursor_id"))
+        .where(Scholarship.is_allowed), q)
+
+    # keyset pagination: continue after the (sort key, id) of the previous page
+    if q.cursor is not None:
+        after = tuple_(*decode_cursor(q.cursor, q.sort))
+        stmt = stmt.where(tuple_(sort_key, Scholarship.id) < after if descending
+                          else tuple_(sort_key, Scholarship.id) > after)
+    if descending:
+        stmt = stmt.order_by(sort_key.desc(), Scholarship.id.desc())
+    else:
+        stmt = stmt.order_by(sort_key, Scholarship.id)
+    if q.limit is not None:
+        stmt = stmt.limit(q.limit + 1)
+
+    rows = (await session.execute(stmt)).all()
+    headers = {}
+    if q.limit is not None and len(rows) > q.limit:
+        rows = rows[:q.limit]
+        headers["X-Next-Cursor"] = encode_cursor(q.sort, rows[-1].sort_key, rows[-1].cursor_id)
+
+    if fields is None:
+        content = [ScholarshipRead.model_validate(row[0]) for row in rows]
+    else:
+        content = [projected_row(fields, row) for row in rows]
+    return content, headers
+
+
 @router.get("/", response_model=list[ScholarshipRead])
 async def list_scholarships(
+    request: Request,
+    q: Annotated[ScholarshipQuery, Query()],
+    session: AsyncSession = Depends(get_read_session),
+):
+    key = cache_key(request)
+    entry = scholarship_cache.get(key)
+    if entry is None:
+        generation = scholarship_cache.generation
+        content, headers = await query_scholarships(session, q)
+        entry = scholarship_cache.put(key, content, generation, headers)
+    return scholarship_cache.respond(request, entry)
+
+@router.get("/search", response_model=list[ScholarshipSearchResult])
+async def search_scholarships(
+    q: str = Query(min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    session: AsyncSession = Depends(get_read_session),
+):
+    # websearch syntax: "exact phrase", -excluded, or
+    query = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+    rank = func.ts_rank_cd(Scholarship.search_vector, query)
+    page = (
+        select(Scholarship.id, rank.label("rank"))
+        .where(Scholarship.is_allowed, Scholarship.search_vector.op("@@")(query))
+        .order_by(rank.desc(), Scholarship.id)
+        .limit(limit)
+        .offset(offset)
+        .subquery()
+    )
+    # ts_headline re-parses the whole text, so only run it for the returned page
+    stmt = (
+        select(
+            Scholarship,
+            page.c.rank,
+            func.ts_headline(SEARCH_CONFIG, Scholarship.name, query, f"HighlightAll=true, {HIGHLIGHT}"),
+            func.ts_headline(SEARCH_CONFIG, func.coalesce(Scholarship.description, ""), query,
+                             f"MaxFragments=2, {HIGHLIGHT}"),
+        )
+        .join(page, page.c.id == Scholarship.id)
+        .order_by(page.c.rank.desc(), Scholarship.id)
+    )
+    rows = (await session.execute(stmt)).all()
+    return [ScholarshipSearchResult(**ScholarshipRead.model_validate(s).model_dump(), rank=rank,
+                                    name_highlight=highlighted(name),
+                                    description_highlight=highlighted(description))
+            for s, rank, name, description in rows]
+
+@router.get("/for-me", response_model=list[ScholarshipMatchRead])
+async def scholarships_for_me(
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    user: User = Depends(current_active_user),
     session: AsyncSession = Depends(get_async_session),
 ):
-    result = await session.execute(select(Scholarship).where(Scholarship.is_allowed))
-    scholarships = result.scalars().all()
-    return scholarships
+    form = await session.get(UserForm, user.id)
+    if not form:
+        raise HTTPException(status_code=404, detail="Form not filled in")
+    await ensure_user_matches(session, form)
+
+    stmt = (
+        select(Scholarship, ScholarshipMatch.score)
+        .join(ScholarshipMatch, ScholarshipMatch.scholarship_id == Scholarship.id)
+        .where(ScholarshipMatch.user_id == user.id)
+        # deadlines pass without the scholarship changing, so filter them here
+        .where(or_(SCHOLARSHIP_DEADLINE == "",
+                   SCHOLARSHIP_DEADLINE >= datetime.now().date().isoformat()))
+        .order_by(ScholarshipMatch.score.desc(), Scholarship.id)
+        .limit(limit)
+        .offset(offset)
+    )
+    rows = (await session.execute(stmt)).all()
+    return [ScholarshipMatchRead(**ScholarshipRead.model_validate(s).model_dump(), score=score)
+            for s, score in rows]
 
 @router.get("/add-to-gcal/{scholarship_id}")
 async def add_to_gcal(scholarship_id: uuid.UUID, session: AsyncSession = Depends(get_async_session)):
@@ -29,30 +227,26 @@ async def add_to_gcal(scholarship_id: uuid.UUID, session: AsyncSession = Depends
     if not scholarship:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
-    dates = scholarship.important_dates
-    if dates is not None:
-        date = dates.get("end_date")
-    else:
-        date = None
-    if date is not None:
-        date = datetime.fromisoformat(date)
-    else:
-        date = datetime.now()
-    name = f"[Stipendify] {scholarship.name}"
-    description = f"Stipendify reminder:\n{shorten(scholarship.description, width=240, placeholder="...")}\n\nhttps://stipendify.tk0.eu"
-    return RedirectResponse(url=generate_url(name, description, date))
+    return RedirectResponse(url=scholarship_url(
+        scholarship.name, scholarship.description, scholarship.important_dates))
 
 
 @router.get("/{scholarship_id}", response_model=ScholarshipRead)
 async def get_scholarship(
+    request: Request,
     scholarship_id: uuid.UUID,
-    session: AsyncSession = Depends(get_async_session),
+    session: AsyncSession = Depends(get_read_session),
 ):
-    scholarship = await session.get(Scholarship, scholarship_id)
-    if not scholarship:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
-    return scholarship
+    key = cache_key(request)
+    entry = scholarship_cache.get(key)
+    if entry is None:
+        generation = scholarship_cache.generation
+        scholarship = await session.get(Scholarship, scholarship_id)
+        if not scholarship:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+        entry = scholarship_cache.put(key, ScholarshipRead.model_validate(scholarship), generation)
+    return scholarship_cache.respond(request, entry)
 
 
 @router.post(
@@ -67,7 +261,9 @@ async def create_scholarship(
         data.is_allowed = False
     scholarship = Scholarship(organisation_id = user.organisation_id, **data.model_dump())
     session.add(scholarship)
-    await session.commit()
+    await session.flush()
+    await refresh_scholarship_matches(session, scholarship.id)
+    await commit_scholarship_changes(session)
     await session.refresh(scholarship)
     return scholarship
 
@@ -91,7 +287,9 @@ async def update_scholarship(
             continue # dont allow orgs to make own scholarships visible
         setattr(scholarship, field, value)
 
-    await session.commit()
+    await session.flush()
+    await refresh_scholarship_matches(session, scholarship.id)
+    await commit_scholarship_changes(session)
     await session.refresh(scholarship)
     return scholarship
 
@@ -109,5 +307,5 @@ async def delete_scholarship(
         raise HTTPException(status_code=401, detail="Unauthorized")
 
     await session.delete(scholarship)
-    await session.commit()
+    await commit_scholarship_changes(session)
     return None
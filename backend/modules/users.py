@@ -1,5 +1,5 @@
 import uuid
-from typing import Optional
+from typing import Any, Optional
 
 from fastapi import Depends, Request, status, HTTPException
 from fastapi_users import BaseUserManager, FastAPIUsers, UUIDIDMixin, models
@@ -10,8 +10,10 @@ from fastapi_users.authentication import (
 )
 from fastapi_users.db import SQLAlchemyUserDatabase
 from httpx_oauth.clients.google import GoogleOAuth2
+import jwt
 from modules.models import User
 from modules.db import get_user_db
+from modules.cache import commit_user_changes, user_cache
 import os
 
 SECRET = os.getenv("AUTH_KEY")
@@ -40,6 +42,22 @@ class UserManager(UUIDIDMixin, BaseUserManager[User, uuid.UUID]):
         print(f"Verification requested for user {
               user.id}. Verification token: {token}")
 
+    # users are cached by token (CachedJWTStrategy), drop them whenever they change
+
+    async def on_after_update(
+        self, user: User, update_dict: dict[str, Any], request: Optional[Request] = None
+    ):
+        await commit_user_changes(self.user_db.session, user.id)
+
+    async def on_after_verify(self, user: User, request: Optional[Request] = None):
+        await commit_user_changes(self.user_db.session, user.id)
+
+    async def on_after_reset_password(self, user: User, request: Optional[Request] = None):
+        await commit_user_changes(self.user_db.session, user.id)
+
+    async def on_after_delete(self, user: User, request: Optional[Request] = None):
+        await commit_user_changes(self.user_db.session, user.id)
+
 
 async def get_user_manager(user_db: SQLAlchemyUserDatabase = Depends(get_user_db)):
     yield UserManager(user_db)
@@ -48,8 +66,27 @@ async def get_user_manager(user_db: SQLAlchemyUserDatabase = Depends(get_user_db
 bearer_transport = BearerTransport(tokenUrl="auth/jwt/login")
 
 
+class CachedJWTStrategy(JWTStrategy[models.UP, models.ID]):
+    """Serves repeated tokens from user_cache instead of loading the user again."""
+
+    async def read_token(self, token: Optional[str], user_manager):
+        if token is None:
+            return None
+        cached = user_cache.get(token)
+        if cached is not None:
+            # a copy attached to this request's session, without a query
+            return await user_manager.user_db.session.merge(cached, load=False)
+        generation = user_cache.generation
+        user = await super().read_token(token, user_manager)
+        if user is not None:
+            # the token is valid, its expiry is all that is left to read
+            expires_at = jwt.decode(token, options={"verify_signature": False}).get("exp")
+            user_cache.put(token, user, generation, expires_at)
+        return user
+
+
 def get_jwt_strategy() -> JWTStrategy[models.UP, models.ID]:
-    return JWTStrategy(secret=SECRET, lifetime_seconds=3600)
+    return CachedJWTStrategy(secret=SECRET, lifetime_seconds=3600)
 
 
 auth_backend = AuthenticationBackend(
@@ -1,100 +1,204 @@
-from sqlalchemy import select
+from sqlalchemy import select, update, literal_column
+from sqlalchemy.dialects.postgresql import insert
 from modules.models import User, Scholarship, Organisation, EmailReminder
-from modules.scrapers import scrape_scholarships
-from modules.utils.send_email import send_email
-import sys, asyncio
+from modules.utils.gcal_url_generator import scholarship_url, deadline
+import os, sys, html
+from collections import defaultdict
 from datetime import datetime
-from sqlalchemy.orm import joinedload
 from modules.db import async_session_maker
+from modules.matching import invalidate_all_matches
+from modules.cache import commit_scholarship_changes
+
+SCRAPED_FIELDS = ("name", "description", "value", "location")
+REMINDER_CHUNK_SIZE = int(os.getenv("REMINDER_CHUNK_SIZE", "500"))
+# scraped scholarships per upsert statement, bounded by the bind parameter limit
+UPSERT_CHUNK_SIZE = int(os.getenv("UPSERT_CHUNK_SIZE", "1000"))
+# one email per user listing all their due reminders, instead of one per reminder
+REMINDER_DIGEST = os.getenv("REMINDER_DIGEST", "true").lower() != "false"
+
+# the scraper and the mail client are imported when first used, a worker that
+# is only waiting for due reminders or the next scrape does not load them
+
+async def upsert_scholarships(session, records) -> dict:
+    """Writes scraped `records` with set based upserts, a few statements per
+    UPSERT_CHUNK_SIZE records, and counts what happened to them."""
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0, "skipped": 0}
+    if not records:
+        return counts
+
+    # the no-op update makes RETURNING give the ids of existing orgs too
+    orgs = {r["oib"]: r["org"] for r in records}
+    stmt = insert(Organisation).values(
+        [{"name": name, "oib": oib, "address": name} for oib, name in orgs.items()])
+    org_ids = dict((await session.execute(
+        stmt.on_conflict_do_update(index_elements=[Organisation.oib],
+                                   set_={"oib": stmt.excluded.oib})
+        .returning(Organisation.oib, Organisation.id))).all())
+
+    for i in range(0, len(records), UPSERT_CHUNK_SIZE):
+        chunk = {r["url"]: r for r in records[i:i + UPSERT_CHUNK_SIZE]}
+
+        # rows scraped before fingerprints existed are recognised by their org,
+        # scholarships posted by organisations with the same url are left alone;
+        # neither is covered by the unique index on scraped urls
+        legacy = (await session.execute(
+            select(Scholarship.id, Scholarship.url, Scholarship.organisation_id)
+            .where(Scholarship.url.in_(chunk), Scholarship.content_hash.is_(None)))).all()
+        adopted = [{"id": id, "content_hash": chunk[url]["content_hash"],
+                    **{field: chunk[url][field] for field in SCRAPED_FIELDS}}
+                   for id, url, org_id in legacy if org_id == org_ids[chunk[url]["oib"]]]
+        if adopted:
+            await session.execute(update(Scholarship), adopted)
+        counts["updated"] += len(adopted)
+        counts["skipped"] += len(legacy) - len(adopted)
+
+        legacy_urls = {url for _, url, _ in legacy}
+        fresh = [r for url, r in chunk.items() if url not in legacy_urls]
+        if not fresh:
+            continue
+        stmt = insert(Scholarship).values([
+            {**{field: r[field] for field in SCRAPED_FIELDS},
+             "url": r["url"], "content_hash": r["content_hash"], "is_allowed": True,
+             "organisation_id": org_ids[r["oib"]]}
+            for r in fresh])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Scholarship.url],
+            index_where=Scholarship.content_hash.isnot(None),
+            set_={field: stmt.excluded[field] for field in (*SCRAPED_FIELDS, "content_hash")},
+            # unchanged pages are not written and not returned
+            where=Scholarship.content_hash.is_distinct_from(stmt.excluded.content_hash))
+        # xmax is 0 only in a freshly inserted row version
+        written = (await session.scalars(stmt.returning(literal_column("xmax = 0")))).all()
+        counts["inserted"] += sum(written)
+        counts["updated"] += len(written) - sum(written)
+        counts["unchanged"] += len(fresh) - len(written)
+    return counts
 
 async def load_scholarships_async():
+    from modules.scrapers import scrape_scholarships
+
     print("Loading new scholarships!!", file=sys.stderr)
-    data = scrape_scholarships()
-    urls = set(s.url for s, _ in data)
-    oibs = set(org.oib for _, org in data)
+    records = list({r["url"]: r for r in await scrape_scholarships()}.values())
 
-    async with async_session_maker() as session:
-        def add_orgid(s, o, new_orgs):
-            org = next(filter(o.__eq__, new_orgs))
-            print(org, org.id, file=sys.stderr)
-            s.organisation_id = org.id
-            return s
-        try:
-            existing_urls = set((await session.scalars(
-                select(Scholarship.url).where(Scholarship.url.in_(urls)))).all())
-            existing_oibs = set((await session.scalars(
-                select(Organisation.oib).where(Organisation.oib.in_(oibs)))).all())
-            new_orgs = set(
-                o for _, o in data if o.oib not in existing_oibs)
-            print(f"trying to add {
-                  [x.__dict__ for x in new_orgs]}", file=sys.stderr)
-            session.add_all(new_orgs)
-            print("added", file=sys.stderr)
-            print("trying to flush", file=sys.stderr)
-            await session.flush()
-            print("flushed", file=sys.stderr)
-            new_sch = set(
-                add_orgid(s, org, new_orgs) for s, org in data if s.url not in existing_urls)
-
-            print(f"Adding {len(new_sch)} new scholarships (and {
-                len(new_orgs)} orgs)", file=sys.stderr)
-            session.add_all(new_sch)
-            print("added")
-
-            await session.commit()
-            print("commited", file=sys.stderr)
-        except Exception as e:
-            print(f"failed ({type(e)}): {e}", file=sys.stderr)
-
-async def send_emails_async():
-    print("Sending new emails!!", file=sys.stderr)
     async with async_session_maker() as session:
         try:
-            current_time = datetime.now()
-            stmt = (
-                select(EmailReminder)
-                .options(
-                    joinedload(EmailReminder.user),
-                    joinedload(EmailReminder.scholarship)
-                )
-                .where(EmailReminder.is_sent == False)
-                .where(EmailReminder.remind_at <= current_time)
-            )
-            reminders = (await session.scalars(stmt)).unique().all()
-
-            emails_sent_count = 0
-
-            for reminder in reminders:
-                recipient = reminder.user.email 
-                scholarship_name = reminder.scholarship.name               
-                subject = f"[Stipendify] Reminder: {scholarship_name}"
-                text = (
-                    "Hello,\n\n"
-                    f"This is a reminder for your scholarship: {scholarship_name}.\n"
-                    "Please check your dashboard for more details.\n\n"
-                    "Best regards,\nStipendify\n\n"
-                    "https://stipendify.tk0.eu\n"
-                )
+            counts = await upsert_scholarships(session, records)
+            print(f"Scholarships: {counts['inserted']} new, {counts['updated']} changed, "
+                  f"{counts['unchanged']} unchanged, {counts['skipped']} left to their organisations",
+                  file=sys.stderr)
+            if counts["inserted"] or counts["updated"]:
+                await invalidate_all_matches(session)
+                await commit_scholarship_changes(session)
+            else:
+                await session.commit()
+        except Exception:
+            await session.rollback()
+            # run_next_job records it as the job's error (last_scrape_error in /admin/stats)
+            raise
+
+def reminder_message(recipient, scholarship_name):
+    from modules.utils.send_email import message
+
+    subject = f"[Stipendify] Reminder: {scholarship_name}"
+    text = (
+        "Hello,\n\n"
+        f"This is a reminder for your scholarship: {scholarship_name}.\n"
+        "Please check your dashboard for more details.\n\n"
+        "Best regards,\nStipendify\n\n"
+        "https://stipendify.tk0.eu\n"
+    )
+    return message(recipient, subject, text)
+
+def digest_message(recipient, scholarships):
+    """`scholarships` is a list of (name, description, important_dates)."""
+    from modules.utils.send_email import message
+
+    subject = (f"[Stipendify] Reminder: {scholarships[0][0]}" if len(scholarships) == 1
+               else f"[Stipendify] {len(scholarships)} scholarship reminders")
+    lines, items = [], []
+    for name, description, dates in scholarships:
+        end = deadline(dates)
+        until = f" (deadline {end:%d.%m.%Y.})" if end else ""
+        url = scholarship_url(name, description, dates)
+        lines.append(f"- {name}{until}\n  Add to Google Calendar: {url}\n")
+        items.append(f'<li><b>{html.escape(name)}</b>{until} '
+                     f'<a href="{html.escape(url)}">Add to Google Calendar</a></li>')
+    text = (
+        "Hello,\n\n"
+        "This is a reminder for your scholarships:\n\n"
+        + "\n".join(lines) +
+        "\nPlease check your dashboard for more details.\n\n"
+        "Best regards,\nStipendify\n\n"
+        "https://stipendify.tk0.eu\n"
+    )
+    body = (
+        "<p>Hello,</p><p>This is a reminder for your scholarships:</p>"
+        f"<ul>{''.join(items)}</ul>"
+        "<p>Please check your dashboard for more details.</p>"
+        '<p>Best regards,<br>Stipendify<br><a href="https://stipendify.tk0.eu">stipendify.tk0.eu</a></p>'
+    )
+    return message(recipient, subject, text, body)
+
+def reminder_messages(reminders):
+    """Returns (message, reminder ids) pairs, one per user in digest mode."""
+    if not REMINDER_DIGEST:
+        return [(reminder_message(r.email, r.name), [r.id]) for r in reminders]
+    by_user = defaultdict(list)
+    for r in reminders:
+        by_user[r.user_id].append(r)
+    return [(digest_message(rs[0].email, [(r.name, r.description, r.important_dates) for r in rs]),
+             [r.id for r in rs])
+            for rs in by_user.values()]
 
+async def send_emails_async(skip=()):
+    """Sends due reminders chunk by chunk, committing after every chunk.
+
+    Each chunk is claimed with FOR UPDATE SKIP LOCKED, so several workers
+    can run this at once, and a crash only re-sends the chunk in flight.
+    Reminders in `skip` are left alone. Returns the ids of the reminders
+    that could not be sent.
+    """
+    from modules.utils.send_email import AsyncMailer
+
+    print("Sending new emails!!", file=sys.stderr)
+    failed = []
+    async with AsyncMailer() as mailer:
+        while True:
+            async with async_session_maker() as session:
+                reminders = []
                 try:
+                    stmt = (
+                        select(EmailReminder.id, EmailReminder.user_id, User.email, Scholarship.name,
+                               Scholarship.description, Scholarship.important_dates)
+                        .join(EmailReminder.user)
+                        .join(EmailReminder.scholarship)
+                        .where(EmailReminder.is_sent == False)
+                        .where(EmailReminder.remind_at <= datetime.utcnow())
+                        # rejected by Mailjet, retried later
+                        .where(EmailReminder.id.not_in([*skip, *failed]))
+                        .order_by(EmailReminder.remind_at)
+                        .limit(REMINDER_CHUNK_SIZE)
+                        .with_for_update(of=EmailReminder, skip_locked=True)
+                    )
+                    reminders = (await session.execute(stmt)).all()
+                    if not reminders:
+                        return failed
 
-                    print(f"Sending email to {recipient}", file=sys.stderr)
-                    send_email(recipient, subject, text)
-                    reminder.is_sent = True
-                    emails_sent_count += 1
+                    messages = reminder_messages(reminders)
+                    results = await mailer.send_all([m for m, _ in messages])
+
+                    sent = [id for (_, ids), ok in zip(messages, results) if ok for id in ids]
+                    failed += [id for (_, ids), ok in zip(messages, results) if not ok for id in ids]
+                    print(f"Sent {len(sent)} of {len(reminders)} reminders "
+                          f"in {len(messages)} emails", file=sys.stderr)
+                    if sent:
+                        await session.execute(
+                            update(EmailReminder)
+                            .where(EmailReminder.id.in_(sent))
+                            .values(is_sent=True))
+                    await session.commit()
                 except Exception as e:
-                    print(f"Failed to send email to {recipient} for reminder {reminder.id}: {e}", file=sys.stderr)
-            if emails_sent_count > 0:
-                await session.commit()
-        except Exception as e:
-            print(f"failed ({type(e)}): {e}", file=sys.stderr)
-
-async def load_scholarships_loop():
-    while True:
-        await load_scholarships_async()
-        await asyncio.sleep(8*60*60)
-
-async def send_emails_loop():
-    while True:
-        await send_emails_async()
-        await asyncio.sleep(5*60)
+                    print(f"failed ({type(e)}): {e}", file=sys.stderr)
+                    return failed + [r.id for r in reminders]
+            if len(reminders) < REMINDER_CHUNK_SIZE:
+                return failed
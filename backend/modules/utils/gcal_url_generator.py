@@ -1,9 +1,26 @@
 from datetime import datetime
+from textwrap import shorten
 from urllib.parse import urlencode
 def generate_url(name: str, description: str, d: datetime):
     d = d.strftime("%Y%m%d/%Y%m%d")
     m = urlencode({"action": "TEMPLATE", "text": name, "details": description, "dates": d, "ctz": "Europe/Zagreb"})
     return f"https://calendar.google.com/calendar/render?{m}"
 
+def deadline(important_dates: dict | None) -> datetime | None:
+    """The scholarship's end_date, None if it has none or it is not an ISO date
+    (organisations fill important_dates in by hand)."""
+    date = (important_dates or {}).get("end_date")
+    try:
+        return datetime.fromisoformat(date)
+    except (TypeError, ValueError):
+        return None
+
+def scholarship_url(name: str, description: str | None, important_dates: dict | None):
+    """Calendar event on the scholarship's deadline, or today if it has none."""
+    date = deadline(important_dates) or datetime.now()
+    name = f"[Stipendify] {name}"
+    description = f"Stipendify reminder:\n{shorten(description or '', width=240, placeholder="...")}\n\nhttps://stipendify.tk0.eu"
+    return generate_url(name, description, date)
+
 if __name__ == "__main__":
     print(generate_url("ZG stipendija", "stipendija grada Zagreba", datetime.now()))
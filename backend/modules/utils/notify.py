@@ -0,0 +1,41 @@
+import sys
+import asyncio
+import asyncpg
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+
+from modules.db import LISTEN_DATABASE_URL
+
+
+async def notify(session, channel: str, payload: str = ""):
+    """Queues a Postgres NOTIFY, listeners get it when the transaction commits."""
+    await session.execute(text("SELECT pg_notify(:channel, :payload)"),
+                          {"channel": channel, "payload": payload})
+
+
+async def listen(handlers: dict, retry_seconds: float = 5):
+    """Calls `handlers[channel](payload)` for every notification, until cancelled.
+
+    Uses its own connection, outside the engine's pool. Notifications sent while
+    it is disconnected are lost, so after every (re)connect each handler is
+    called once with None and should treat it as "anything may have changed".
+    """
+    url = make_url(LISTEN_DATABASE_URL).set(drivername="postgresql").render_as_string(hide_password=False)
+    while True:
+        try:
+            conn = await asyncpg.connect(url)
+            try:
+                closed = asyncio.Event()
+                conn.add_termination_listener(lambda c: closed.set())
+                for channel, handler in handlers.items():
+                    await conn.add_listener(
+                        channel, lambda c, pid, ch, payload, handler=handler: handler(payload))
+                    handler(None)
+                await closed.wait()
+            finally:
+                await conn.close()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"listen failed ({type(e)}): {e}", file=sys.stderr)
+        await asyncio.sleep(retry_seconds)
@@ -0,0 +1,65 @@
+"""Import time breakdown of an entry point.
+
+    python main.py --profile-startup
+    python -m modules.worker --profile-startup
+
+Imports the module again in a fresh interpreter with `-X importtime`, so the
+numbers are those of a cold start and not of the already running process.
+"""
+import os
+import sys
+import subprocess
+from collections import defaultdict
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def import_times(module: str) -> list[tuple[int, int, int, str]]:
+    """(depth, self us, cumulative us, name) per imported module, in import order."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=BACKEND_DIR, capture_output=True, text=True)
+    if result.returncode != 0:
+        sys.exit(result.stderr)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line.removeprefix("import time:").split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((depth, int(own), int(cumulative), name.strip()))
+    return rows
+
+
+def module_rows(rows, module: str):
+    """The entry for `module` and the rows of everything it imported.
+
+    -X importtime lists a module after the ones it imports, so those are the
+    rows between the previous entry at the same depth and its own; modules
+    the interpreter imported at startup come before that and are left out.
+    """
+    end = next(i for i, (_, _, _, name) in enumerate(rows) if name == module)
+    depth = rows[end][0]
+    start = end
+    while start > 0 and rows[start - 1][0] > depth:
+        start -= 1
+    return rows[end], rows[start:end]
+
+
+def profile_imports(module: str, top: int = 15):
+    entry, rows = module_rows(import_times(module), module)
+    depth, _, total, _ = entry
+    print(f"importing {module} took {total / 1000:.1f} ms")
+
+    # the entry point's own imports, each charged with everything it pulled in first
+    direct = [(cumulative, name) for d, _, cumulative, name in rows if d == depth + 1]
+    print(f"\nimported by {module}:")
+    for cumulative, name in sorted(direct, reverse=True)[:top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    # the same time split by top level package, no matter who imported it first
+    packages = defaultdict(int)
+    for _, own, _, name in [*rows, entry]:
+        packages[name.split(".")[0]] += own
+    print("\nby package:")
+    for name, own in sorted(packages.items(), key=lambda p: p[1], reverse=True)[:top]:
+        print(f"  {own / 1000:8.1f} ms  {name}")
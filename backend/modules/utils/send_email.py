@@ -26,28 +26,87 @@ curl -s \
 	}'
 """
 
-import requests as r
+import httpx
+import asyncio
 import os, sys
-auth = r.auth.HTTPBasicAuth(os.getenv("MAILJET_API_KEY"), os.getenv("MAILJET_SECRET_KEY"))
-EMAIL_ENABLED = auth.username is not None and auth.password is not None
+auth = (os.getenv("MAILJET_API_KEY"), os.getenv("MAILJET_SECRET_KEY"))
+EMAIL_ENABLED = None not in auth
 SENDER_EMAIL = "no-reply@stipendify.tk0.eu"
 SENDER_NAME = "Stipendify"
-def send_email(to, subject, text=None, html=None):
-    if not EMAIL_ENABLED:
-        print(f"EMAIL: {to = }, {subject = }, {text = }", file=sys.stderr)
-        return None
-    d = {"Messages": [
-        {"From": 
+MAILJET_URL = "https://api.mailjet.com/v3.1/send"
+# Mailjet takes at most 50 messages per send call
+BATCH_SIZE = 50
+CONCURRENCY = int(os.getenv("MAILJET_CONCURRENCY", "4"))
+
+def message(to, subject, text=None, html=None):
+    m = {"From": 
            {"Email": SENDER_EMAIL, "Name": SENDER_NAME}, 
          "To": [{"Email": to}],
-         "Subject": subject}]}
+         "Subject": subject}
     if text is not None:
-        d["Messages"][0]["TextPart"] = text
+        m["TextPart"] = text
     if html is not None:
-        d["Messages"][0]["HTMLPart"] = html
+        m["HTMLPart"] = html
+    return m
+
+def send_email(to, subject, text=None, html=None):
+    if not EMAIL_ENABLED:
+        print(f"EMAIL: {to = }, {subject = }, {text = }", file=sys.stderr)
+        return None
+    # only the synchronous path needs requests, keep it off the import path
+    import requests as r
+    d = {"Messages": [message(to, subject, text, html)]}
     print(d)
-    req = r.post("https://api.mailjet.com/v3.1/send", auth=auth, json=d)
+    req = r.post(MAILJET_URL, auth=auth, json=d)
     return req.json()
 
+
+class AsyncMailer:
+    """Sends messages in batches of BATCH_SIZE over one pooled connection set.
+
+        async with AsyncMailer() as mailer:
+            results = await mailer.send_all([message(...), ...])
+    """
+
+    def __init__(self, concurrency=CONCURRENCY):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.client = httpx.AsyncClient(
+            auth=auth if EMAIL_ENABLED else None,
+            timeout=30,
+            limits=httpx.Limits(max_connections=concurrency))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.client.aclose()
+
+    async def send_batch(self, messages):
+        """Returns one True/False per message, in order."""
+        if not EMAIL_ENABLED:
+            for m in messages:
+                print(f"EMAIL: to = {m['To'][0]['Email']!r}, subject = {m['Subject']!r}", file=sys.stderr)
+            return [True] * len(messages)
+        async with self.semaphore:
+            try:
+                response = await self.client.post(MAILJET_URL, json={"Messages": messages})
+                # a 400 still reports which of the messages were accepted
+                statuses = response.json().get("Messages")
+            except (httpx.HTTPError, ValueError) as e:
+                print(f"Mailjet request failed: {e}", file=sys.stderr)
+                return [False] * len(messages)
+        if not statuses or len(statuses) != len(messages):
+            print(f"Mailjet error {response.status_code}: {response.text}", file=sys.stderr)
+            return [False] * len(messages)
+        for m, status in zip(messages, statuses):
+            if status.get("Status") != "success":
+                print(f"Failed to send email to {m['To'][0]['Email']}: {status.get('Errors')}", file=sys.stderr)
+        return [status.get("Status") == "success" for status in statuses]
+
+    async def send_all(self, messages):
+        batches = [messages[i:i + BATCH_SIZE] for i in range(0, len(messages), BATCH_SIZE)]
+        results = await asyncio.gather(*(self.send_batch(b) for b in batches))
+        return [ok for batch in results for ok in batch]
+
 if __name__ == "__main__":
     print(send_email("karloks2005@gmail.com", "Hello from Stipendify", text=":3"))
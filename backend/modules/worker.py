@@ -0,0 +1,51 @@
+"""Background worker: scrapes scholarships and sends email reminders.
+
+Run with `python -m modules.worker`. Any number of workers can run next to
+any number of API replicas, jobs are handed out through the `job` table.
+Reminders are sent by the ReminderScheduler when they are due.
+"""
+import os
+import sys
+import asyncio
+from datetime import timedelta
+
+from modules.db import migrate_database, migration_head, startup_state
+from modules.jobs import schedule_job, run_next_job
+from modules.reminder_scheduler import REMINDERS_CHANNEL, ReminderScheduler
+from modules.utils.background_workers import load_scholarships_async, send_emails_async
+from modules.utils.notify import listen
+
+POLL_INTERVAL = int(os.getenv("WORKER_POLL_SECONDS", "30"))
+
+JOBS = {
+    "scrape": (load_scholarships_async, timedelta(hours=8)),
+}
+
+
+async def run_jobs():
+    for kind in JOBS:
+        await schedule_job(kind)
+
+    while True:
+        if not await run_next_job(JOBS):
+            await asyncio.sleep(POLL_INTERVAL)
+
+
+async def main():
+    version, _ = await startup_state()
+    if version != migration_head():
+        await migrate_database()
+    scheduler = ReminderScheduler(send_emails_async)
+    await asyncio.gather(
+        run_jobs(),
+        scheduler.run(),
+        listen({REMINDERS_CHANNEL: scheduler.on_notify}),
+    )
+
+
+if __name__ == "__main__":
+    if "--profile-startup" in sys.argv:
+        from modules.utils.profile_startup import profile_imports
+        profile_imports("modules.worker")
+        sys.exit()
+    asyncio.run(main())
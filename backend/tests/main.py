@@ -2,6 +2,8 @@ import pytest
 import httpx
 import uuid
 import os
+import json
+import base64
 from datetime import datetime, timedelta, UTC
 
 ### Config
@@ -29,6 +31,15 @@ def get_auth_headers(client, email, password):
     token = response.json()["access_token"]
     return {"Authorization": f"Bearer {token}"}
 
+def all_matches(client, headers):
+    """Score by id of every /scholarships/for-me match, the test database holds more than a page."""
+    scores, offset = {}, 0
+    while page := client.get("/scholarships/for-me", params={"limit": 500, "offset": offset},
+                             headers=headers).json():
+        scores.update((s["id"], s["score"]) for s in page)
+        offset += len(page)
+    return scores
+
 ### Tests
 def test_full_scholarship(client, unique_id):
     """
@@ -148,3 +159,215 @@ def test_admin_stats(client):
     data = resp.json()
     assert "users" in data
     assert "active_scholarships" in data
+
+    # the trigger maintained counters agree with counting the tables
+    exact = client.get("/admin/stats", params={"exact": True}, headers=admin_headers).json()
+    for key in ("users", "orgs", "active_scholarships", "inactive_scholarships"):
+        assert data[key] == exact[key]
+    assert "pending_reminders" in data
+
+def test_scholarship_pagination(client):
+    """Walk the public list page by page and compare it with the full list."""
+    full = client.get("/scholarships/").json()
+
+    seen = []
+    params = {"limit": 2, "fields": "name,value"}
+    while True:
+        resp = client.get("/scholarships/", params=params)
+        assert resp.status_code == 200
+        page = resp.json()
+        assert len(page) <= 2
+        assert all(set(s) == {"id", "name", "value"} for s in page)
+        seen += [s["id"] for s in page]
+        cursor = resp.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        params["cursor"] = cursor
+
+    assert len(seen) == len(set(seen))
+    assert set(seen) == {s["id"] for s in full}
+
+    assert client.get("/scholarships/", params={"fields": "nope"}).status_code == 400
+
+    # a cursor only continues the sort it was made for
+    cursor = client.get("/scholarships/", params={"limit": 1}).headers["X-Next-Cursor"]
+    assert client.get("/scholarships/", params={"sort": "value", "cursor": cursor}).status_code == 400
+    forged = base64.urlsafe_b64encode(json.dumps(["value", "abc", str(uuid.uuid4())]).encode()).decode()
+    assert client.get("/scholarships/", params={"sort": "value", "cursor": forged}).status_code == 400
+
+def test_scholarship_list_fields(client, unique_id):
+    """Projected fields look like they do in the full list, deadline_after keeps its own day."""
+    admin_headers = get_auth_headers(client, ADMIN_EMAIL, ADMIN_PASS)
+    today = datetime.now().date()
+    resp = client.post("/scholarships/", json={
+        "name": f"Fields {unique_id}",
+        "value": 200,
+        "url": f"https://example.com/{unique_id}/fields",
+        "is_allowed": True,
+        "min_grade_average": 3.5,
+        "length_of_scholarship": "P30D",
+        "important_dates": {"end_date": today.isoformat()},
+    }, headers=admin_headers)
+    assert resp.status_code == 201
+    id = resp.json()["id"]
+
+    params = {"deadline_after": f"{today.isoformat()}T12:00:00",
+              "fields": "length_of_scholarship,min_grade_average"}
+    listed = {s["id"]: s for s in client.get("/scholarships/", params=params).json()}
+    assert listed[id] == {"id": id, "length_of_scholarship": "P30D", "min_grade_average": 3.5}
+    full = next(s for s in client.get("/scholarships/").json() if s["id"] == id)
+    assert full["length_of_scholarship"] == listed[id]["length_of_scholarship"]
+
+def test_scholarships_for_me(client, unique_id):
+    """Student fills in the form and gets matching scholarships ranked."""
+    admin_headers = get_auth_headers(client, ADMIN_EMAIL, ADMIN_PASS)
+
+    # admin posts two scholarships, only one of them fits the student below
+    ids = {}
+    for name, min_grade in (("fits", 3.0), ("too-strict", 4.9)):
+        resp = client.post("/scholarships/", json={
+            "name": f"Match {name} {unique_id}",
+            "value": 150,
+            "url": f"https://example.com/{unique_id}/{name}",
+            "is_allowed": True,
+            "min_grade_average": min_grade,
+            "location": "Zagreb",
+        }, headers=admin_headers)
+        assert resp.status_code == 201
+        ids[name] = resp.json()["id"]
+
+    student_email = f"matcher_{unique_id}@test.example.com"
+    client.post("/auth/register", json={"email": student_email, "password": "studentpass"})
+    student_headers = get_auth_headers(client, student_email, "studentpass")
+
+    assert client.get("/scholarships/for-me", headers=student_headers).status_code == 404
+
+    form_resp = client.put("/form", json={
+        "city": "Zagreb",
+        "grade_point_average": 4.2,
+        "year_of_study": 2,
+        "type_of_study": "Diplomski",
+    }, headers=student_headers)
+    assert form_resp.status_code == 200
+
+    match_ids = all_matches(client, student_headers)
+    assert ids["fits"] in match_ids
+    assert ids["too-strict"] not in match_ids
+
+    # a changed scholarship is reflected in the cached matches
+    client.put(f"/scholarships/{ids['too-strict']}", json={"min_grade_average": 4.0},
+               headers=admin_headers)
+    assert ids["too-strict"] in all_matches(client, student_headers)
+
+def test_scholarships_for_me_ses(client, unique_id):
+    """Need based scholarships rank higher for students of low socio-economic status."""
+    admin_headers = get_auth_headers(client, ADMIN_EMAIL, ADMIN_PASS)
+    ids = {}
+    for name, description in (("need", "Kriterij socijalnog statusa i uspjeha."), ("merit", "Kriterij uspjeha.")):
+        resp = client.post("/scholarships/", json={
+            "name": f"Ses {name} {unique_id}",
+            "value": 150,
+            "url": f"https://example.com/{unique_id}/{name}",
+            "is_allowed": True,
+            "min_grade_average": None,
+            "location": "Rijeka",
+            "description": description,
+        }, headers=admin_headers)
+        assert resp.status_code == 201
+        ids[name] = resp.json()["id"]
+
+    for ses in ("nizak", "visok"):
+        email = f"ses_{ses}_{unique_id}@test.example.com"
+        client.post("/auth/register", json={"email": email, "password": "studentpass"})
+        headers = get_auth_headers(client, email, "studentpass")
+        assert client.put("/form", json={"city": "Rijeka", "ses": ses}, headers=headers).status_code == 200
+        scores = all_matches(client, headers)
+        if ses == "nizak":
+            assert scores[ids["need"]] > scores[ids["merit"]]
+        else:
+            assert scores[ids["need"]] == scores[ids["merit"]]
+
+def test_scholarship_search(client, unique_id):
+    """Search finds inflected and diacritic-less forms of words, best match first."""
+    admin_headers = get_auth_headers(client, ADMIN_EMAIL, ADMIN_PASS)
+    ids = {}
+    for key, name, description in (
+        ("name", f"Stipendija za studente iz Šibenika {unique_id}", "Opis"),
+        ("description", f"Potpora {unique_id}", "Namijenjena <img src=x onerror=alert(1)> studentima iz Šibenika."),
+    ):
+        resp = client.post("/scholarships/", json={
+            "name": name,
+            "value": 100,
+            "url": f"https://example.com/{unique_id}/{key}",
+            "is_allowed": True,
+            "min_grade_average": None,
+            "description": description,
+        }, headers=admin_headers)
+        assert resp.status_code == 201
+        ids[key] = resp.json()["id"]
+
+    resp = client.get("/scholarships/search", params={"q": f"studenti sibenik {unique_id}"})
+    assert resp.status_code == 200
+    results = resp.json()
+    assert [r["id"] for r in results] == [ids["name"], ids["description"]]
+    assert "<mark>" in results[0]["name_highlight"]
+    # the scholarship's own markup is escaped, only the highlighting is HTML
+    assert "<img" not in results[1]["description_highlight"]
+    assert "&lt;img" in results[1]["description_highlight"]
+
+    pages = [client.get("/scholarships/search", params={"q": unique_id, "limit": 1, "offset": offset}).json()
+             for offset in (0, 1, 2)]
+    assert sorted(r["id"] for page in pages for r in page) == sorted(ids.values())
+
+def test_scholarship_cache(client, unique_id):
+    """Public reads carry an ETag, revalidate with 304 and see edits right away."""
+    admin_headers = get_auth_headers(client, ADMIN_EMAIL, ADMIN_PASS)
+    resp = client.post("/scholarships/", json={
+        "name": f"Cached {unique_id}",
+        "value": 100,
+        "url": f"https://example.com/{unique_id}/cached",
+        "is_allowed": True,
+        "min_grade_average": None,
+    }, headers=admin_headers)
+    scholarship_id = resp.json()["id"]
+
+    first = client.get(f"/scholarships/{scholarship_id}")
+    etag = first.headers["ETag"]
+    again = client.get(f"/scholarships/{scholarship_id}", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+
+    client.put(f"/scholarships/{scholarship_id}", json={"value": 200}, headers=admin_headers)
+    changed = client.get(f"/scholarships/{scholarship_id}", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()["value"] == 200
+
+    stats = client.get("/admin/cache", headers=admin_headers).json()["scholarships"]
+    assert stats["not_modified"] >= 1
+    assert 0 <= stats["hit_rate"] <= 1
+
+def test_admin_pool(client):
+    """Pool metrics are exposed to admins only."""
+    assert client.get("/admin/pool").status_code == 401
+    admin_headers = get_auth_headers(client, ADMIN_EMAIL, ADMIN_PASS)
+    data = client.get("/admin/pool", headers=admin_headers).json()
+    # the cached admin user means this request itself may not need a connection
+    assert 0 <= data["checked_out"] <= data["size"] + data["max_overflow"]
+    assert data["checkouts"] >= 1
+
+def test_user_cache(client, unique_id):
+    """Repeated tokens are served from the cache, until the user changes."""
+    email = f"cached_{unique_id}@test.com"
+    client.post("/auth/register", json={"email": email, "password": "Password123"})
+    headers = get_auth_headers(client, email, "Password123")
+    admin_headers = get_auth_headers(client, ADMIN_EMAIL, ADMIN_PASS)
+
+    before = client.get("/admin/cache", headers=admin_headers).json()["users"]["hits"]
+    user = client.get("/users/me", headers=headers).json()
+    client.get("/users/me", headers=headers)
+    assert client.get("/admin/cache", headers=admin_headers).json()["users"]["hits"] > before
+
+    client.patch("/users/me", json={"first_name": "Cached"}, headers=headers)
+    assert client.get("/users/me", headers=headers).json()["first_name"] == "Cached"
+
+    client.patch(f"/users/{user['id']}", json={"is_active": False}, headers=admin_headers)
+    assert client.get("/users/me", headers=headers).status_code == 401
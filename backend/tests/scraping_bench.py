@@ -0,0 +1,189 @@
+import pytest
+import asyncio
+import importlib
+import inspect
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import urllib.request
+from collections import defaultdict
+
+### Config
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# scraping/ next to the backend's modules/, as it is mounted in the container
+sys.path[:0] = [ROOT, os.path.join(ROOT, "backend")]
+
+import bs4
+import httpx
+import requests
+from scraping import PdfText
+from scraping.Replay import ReplayServer, routed
+from scraping.RSSFetcher import RSSFetcher, FEED_URL
+
+SCRAPERS = ["ZagrebScraper", "RijekaScraper", "SibenikScraper", "SplitScraper"]
+# highest traced allocation during one run, a run over its budget fails
+MEMORY_BUDGET_KB = {
+    "ZagrebScraper": 500,
+    "RijekaScraper": 500,
+    "SibenikScraper": 2_500,
+    "SplitScraper": 100,
+    "rss": 200,
+    "load_scholarships": 4_000,
+}
+
+### Helpers
+class Stages:
+    """Milliseconds spent in fetching, parsing ... while active, summed over
+    calls, so stages that run concurrently can add up to more than the total."""
+
+    def __init__(self, **targets):
+        # stage -> [(owner, attribute)]
+        self.targets = targets
+        self.ms = defaultdict(float)
+        self.saved = []
+
+    def timed(self, stage, fn):
+        if inspect.iscoroutinefunction(fn):
+            async def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    self.ms[stage] += (time.perf_counter() - start) * 1000
+        else:
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.ms[stage] += (time.perf_counter() - start) * 1000
+        return wrapper
+
+    def __enter__(self):
+        for stage, targets in self.targets.items():
+            for owner, name in targets:
+                fn = getattr(owner, name)
+                self.saved.append((owner, name, fn))
+                setattr(owner, name, self.timed(stage, fn))
+        return self
+
+    def __exit__(self, *exc):
+        for owner, name, fn in reversed(self.saved):
+            setattr(owner, name, fn)
+        self.saved = []
+
+
+def scraping_stages(**more):
+    return Stages(
+        fetch=[(requests.adapters.HTTPAdapter, "send"),
+               (httpx.AsyncHTTPTransport, "handle_async_request"),
+               (urllib.request.OpenerDirector, "open")],
+        parse=[(bs4.BeautifulSoup, "__init__")],
+        pdf=[(PdfText, "extract_text")],
+        **more)
+
+
+def run(benchmark, name, fn, stages=None, rounds=None):
+    """Benchmarks `fn`, plus one run for the stage breakdown and one for the
+    memory peak, both kept in the benchmark's extra_info."""
+    stages = stages or scraping_stages()
+    start = time.perf_counter()
+    with stages:
+        fn()
+    total = (time.perf_counter() - start) * 1000
+    benchmark.extra_info["stages_ms"] = {
+        **{stage: round(ms, 2) for stage, ms in stages.ms.items()},
+        "total": round(total, 2)}
+
+    tracemalloc.start()
+    try:
+        fn()
+        peak_kb = tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+    benchmark.extra_info["peak_kb"] = round(peak_kb)
+
+    if rounds:
+        result = benchmark.pedantic(fn, rounds=rounds, iterations=1, warmup_rounds=1)
+    else:
+        result = benchmark(fn)
+    assert peak_kb <= MEMORY_BUDGET_KB[name], f"{name} peaked at {peak_kb:.0f} KB"
+    return result
+
+
+### Fixtures
+@pytest.fixture(scope="module")
+def replay():
+    with ReplayServer() as server, routed(server):
+        yield server
+    # a miss means a scraper now fetches something that was never recorded
+    assert not server.misses, f"not recorded: {server.misses}, run python -m scraping.Replay record"
+
+
+@pytest.fixture(scope="module")
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope="module")
+def database(loop):
+    from sqlalchemy import text
+    from modules.db import engine
+
+    async def ping():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1 FROM scholarship LIMIT 1"))
+    try:
+        loop.run_until_complete(ping())
+    except Exception as e:
+        pytest.skip(f"no migrated database at DATABASE_URL: {e}")
+    yield engine
+    loop.run_until_complete(engine.dispose())
+
+### Tests
+@pytest.mark.parametrize("source", SCRAPERS)
+def test_scrape(benchmark, replay, source):
+    module = importlib.import_module(f"scraping.{source}")
+    scholarships = run(benchmark, source, module.scrape)
+    if source != "SplitScraper":
+        assert scholarships
+
+def test_rss_fetch(benchmark, replay):
+    fetcher = RSSFetcher(FEED_URL)
+    entries = run(benchmark, "rss", fetcher.fetch)
+    assert any("stipend" in e.title.lower() for e in entries)
+
+def test_load_scholarships(benchmark, replay, database, loop, monkeypatch, tmp_path):
+    from sqlalchemy import select
+    from modules import scrapers
+    from modules.db import async_session_maker
+    from modules.models import Scholarship
+    from modules.utils.background_workers import load_scholarships_async
+
+    # scrape_scholarships globs scraping/*Scraper.py
+    monkeypatch.chdir(ROOT)
+
+    def load():
+        # every round is a cold crawl, without the http and pdf caches of earlier ones
+        os.environ["SCRAPER_CACHE_DIR"] = tempfile.mkdtemp(dir=tmp_path)
+        PdfText.CACHE_DIR = tempfile.mkdtemp(dir=tmp_path)
+        loop.run_until_complete(load_scholarships_async())
+
+    monkeypatch.setenv("SCRAPER_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(PdfText, "CACHE_DIR", str(tmp_path))
+    stages = scraping_stages(scrape=[(scrapers, "scrape_scholarships")])
+    run(benchmark, "load_scholarships", load, stages=stages, rounds=5)
+    benchmark.extra_info["stages_ms"]["database"] = round(
+        benchmark.extra_info["stages_ms"]["total"] - benchmark.extra_info["stages_ms"]["scrape"], 2)
+
+    async def loaded():
+        async with async_session_maker() as session:
+            return (await session.execute(select(Scholarship.location).where(
+                Scholarship.url.in_(replay.store.index)))).scalars().all()
+    locations = loop.run_until_complete(loaded())
+    # the city a scholarship is for, matching leaves out students from elsewhere
+    assert locations and all(locations)
@@ -0,0 +1,84 @@
+import os
+import functools
+from importlib.util import find_spec
+import requests
+from bs4 import BeautifulSoup, SoupStrainer
+if __package__:
+    from scraping.Extract import extract
+else:
+    from Extract import extract
+
+
+def default_parser():
+    return "lxml" if find_spec("lxml") else "html.parser"
+
+
+# any BeautifulSoup tree builder: lxml (default when installed), html.parser, html5lib
+PARSER = os.getenv("SCRAPER_PARSER") or default_parser()
+
+
+def parse(html, parse_only=None):
+    """BeautifulSoup tree of `html`, with only the parts `parse_only` matches."""
+    return BeautifulSoup(html, PARSER, parse_only=parse_only)
+
+
+class TagStrainer(SoupStrainer):
+    """Keeps just the given "h1" / ("div", "opis") tags and everything inside
+    them, the rest of the page is never built into the tree."""
+
+    def __init__(self, *tags):
+        super().__init__()
+        self.tags = [(tag, None) if isinstance(tag, str) else tag for tag in tags]
+
+    def allow_tag_creation(self, nsprefix, name, attrs):
+        classes = (attrs or {}).get("class") or ""
+        if isinstance(classes, str):
+            classes = classes.split()
+        return any(name == tag and (css is None or css in classes) for tag, css in self.tags)
+
+
+def memoized(method):
+    """Caches the result of an argument-less getter on the instance.
+
+    Getters call each other a lot (get_all -> get_categories -> get_details
+    ...), with this every DOM walk and regex pass runs once per page.
+    """
+    name = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self):
+        if not self.memoize:
+            return method(self)
+        if name not in self._memo:
+            self._memo[name] = method(self)
+        return self._memo[name]
+    return wrapper
+
+
+class BaseScraper:
+    # switched off by benchmarks/bench_parse.py to compare against plain getters
+    memoize = True
+    # the parts of the page the getters read, a TagStrainer; None parses everything
+    parse_only = None
+
+    def __init__(self, url, html=None):
+        self.url = url
+        self.html = html
+        self._memo = {}
+        self.soup = self.get_soup()
+
+    def get_soup(self):
+        if self.html is None:
+            response = requests.get(self.url)
+            response.encoding = "utf-8"
+            self.html = response.text
+        return parse(self.html, self.parse_only)
+
+    @memoized
+    def get_text(self):
+        return self.soup.get_text()
+
+    @memoized
+    def get_extracted(self):
+        """Amounts, durations and dates in get_details(), see Extract.py."""
+        return extract(self.get_details())
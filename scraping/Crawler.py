@@ -0,0 +1,125 @@
+import sys
+import time
+import asyncio
+import hashlib
+import inspect
+from collections import defaultdict
+from contextvars import ContextVar
+from urllib.parse import urlsplit
+
+import httpx
+
+USER_AGENT = "stipendify-scraper/1.0 (+https://stipendify.tk0.eu)"
+
+# url -> sha256 of everything fetched while a page is parsed
+_fetched = ContextVar("fetched", default=None)
+
+
+class Crawler:
+    """Shared async HTTP client for all scrapers.
+
+    Keeps one pooled keep-alive connection set for the whole crawl and
+    limits how many requests run against a single host at the same time,
+    so the city websites are not flooded when all scrapers run in parallel.
+    With an `HttpCache` every request is made conditional.
+    """
+
+    def __init__(self, per_host=4, max_connections=32, timeout=30, cache=None):
+        self.per_host = per_host
+        self.cache = cache
+        self.client = httpx.AsyncClient(
+            headers={"User-Agent": USER_AGENT},
+            timeout=timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections),
+        )
+        self.host_limits = defaultdict(lambda: asyncio.Semaphore(self.per_host))
+        self.timings = defaultdict(list)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        await self.client.aclose()
+
+    async def fetch(self, url):
+        """Returns `(body, modified)`, modified is False if the cached copy is current."""
+        headers = self.cache.conditional_headers(url) if self.cache else {}
+        host = urlsplit(url).hostname
+        async with self.host_limits[host]:
+            start = time.perf_counter()
+            response = await self.client.get(url, headers=headers)
+            self.timings[host].append(time.perf_counter() - start)
+        if response.status_code == 304 and self.cache:
+            body, modified = self.cache.not_modified(url), False
+        else:
+            response.raise_for_status()
+            body = response.content
+            modified = self.cache.store(url, response) if self.cache else True
+        if (fetched := _fetched.get()) is not None:
+            fetched[url] = hashlib.sha256(body).hexdigest()
+        return body, modified
+
+    async def get_text(self, url):
+        body, _ = await self.fetch(url)
+        return body.decode("utf-8", errors="replace")
+
+    async def get_bytes(self, url):
+        body, _ = await self.fetch(url)
+        return body
+
+    async def get_many(self, urls, binary=False):
+        """Fetches all urls concurrently, failed ones map to the raised exception."""
+        get = self.get_bytes if binary else self.get_text
+        bodies = await asyncio.gather(*(get(u) for u in urls),
+                                      return_exceptions=True)
+        return dict(zip(urls, bodies))
+
+    async def scrape_pages(self, urls, parse):
+        """Fetches and parses all urls concurrently, skipping pages that fail.
+
+        `parse(url, html)` is run in a worker thread, or awaited if it is a
+        coroutine function (for scrapers that need more requests per page).
+        Pages that did not change since the last crawl, and neither did what
+        was fetched while parsing them, are not parsed again, their cached
+        result is returned instead.
+        """
+        async def load(url):
+            try:
+                body, modified = await self.fetch(url)
+                if not modified and (cached := self.cache.get_parsed(url)):
+                    parsed, depends_on = cached
+                    if await self.unchanged(depends_on):
+                        return parsed
+                html = body.decode("utf-8", errors="replace")
+                fetched = {}
+                _fetched.set(fetched)
+                if inspect.iscoroutinefunction(parse):
+                    parsed = await parse(url, html)
+                else:
+                    parsed = await asyncio.to_thread(parse, url, html)
+                if self.cache:
+                    self.cache.put_parsed(url, parsed, fetched)
+                return parsed
+            except Exception as e:
+                print(f"Loading {url} failed, skipping\n{e}", file=sys.stderr)
+
+        results = await asyncio.gather(*(load(u) for u in urls))
+        return [r for r in results if r is not None]
+
+    async def unchanged(self, digests):
+        """True if every url in `{url: sha256}` still has that body."""
+        bodies = await self.get_many(list(digests), binary=True)
+        return all(not isinstance(body, Exception) and hashlib.sha256(body).hexdigest() == digest
+                   for body, digest in zip(bodies.values(), digests.values()))
+
+    def report(self, file=sys.stderr):
+        for host, times in sorted(self.timings.items()):
+            print(f"{host}: {len(times)} requests, {sum(times):.2f}s total, "
+                  f"{max(times):.2f}s slowest", file=file)
+        if self.cache:
+            print(f"http cache: {self.cache.stats()}", file=file)
@@ -0,0 +1,150 @@
+"""Amounts, durations and dates in Croatian scholarship texts.
+
+All scrapers share one precompiled pattern and read a text in a single pass:
+
+    >>> e = extract("Iznos stipendije je 150,00 EUR mjesečno, prijave do 31.10.2025.")
+    >>> e.amounts[0]
+    Amount(value=150.0, currency='EUR', period='month', raw='150,00 EUR mjesečno', after_keyword=True, low=None)
+    >>> e.deadline.value
+    datetime.date(2025, 10, 31)
+
+The scrapers decide which amounts are plausible for their city, see values().
+"""
+import re
+from datetime import date
+from typing import NamedTuple
+
+# 1.500,00 / 1.500 / 150,00 / 150.00 / 150 - dots group thousands only when
+# three digits follow, so 150.00 is still a decimal
+NUMBER = r"(?:\d{1,3}(?:[.\u00a0]\d{3})+|\d+)(?:[.,]\d{2})?(?!\d)"
+CURRENCY = r"(?:€|\$|£|(?:eur(?:[aoi]|om)?|kn|kun[aeiu]|hrk|usd|gbp)\b)"
+PERIOD = r"(?:mjese[čc]n[oi]|na\s+mjesec|po\s+mjesecu|godi[šs]nje|na\s+godinu|jednokratno)"
+
+# Every alternative starts with a digit or a currency sign, which the leading
+# lookahead checks before anything else is tried. Words that only give context
+# ("od", "do", "na", "stipendija") are looked up behind a match, see extract().
+PATTERN = re.compile(rf"""
+    (?=[\d€$£])(?<![\d.,])(?:
+        (?P<range>(?P<low>{NUMBER})\s*(?:{CURRENCY}\s*)?(?:do|-|–)\s*(?P<high>{NUMBER})
+            \s*(?P<range_currency>{CURRENCY})(?:\s*(?P<range_period>{PERIOD}))?)
+      | (?P<date>(?P<day>\d{{1,2}})\.\s?(?P<month>\d{{1,2}})\.\s?(?P<year>\d{{4}}))
+      | (?P<amount>{NUMBER})\s*(?P<currency>{CURRENCY})(?:\s*(?P<period>{PERIOD}))?
+      | (?P<currency_first>[€$£])\s*(?P<amount_after>{NUMBER})(?:\s*(?P<period_after>{PERIOD}))?
+      | (?P<length>\d+)\s+(?P<unit>mjesec|godin)
+    )
+""", re.IGNORECASE | re.VERBOSE)
+
+# context right before a date or a duration, searched up to the match only
+PREPOSITION = re.compile(r"(?:\bod|\bdo|zaklju[čc]no(?:\s+sa?)?)\s+$", re.IGNORECASE)
+DURATION = re.compile(r"(?:\bna|\btraje|u\s+trajanju\s+od|razdoblj[eu]\s+od)\s+$", re.IGNORECASE)
+KEYWORD = re.compile(r"stipendij[ae]|iznos", re.IGNORECASE)
+# how far back PREPOSITION and DURATION look
+BEHIND = 24
+
+# by the first three letters
+CURRENCIES = {"€": "EUR", "eur": "EUR", "kn": "HRK", "kun": "HRK", "hrk": "HRK",
+              "$": "USD", "usd": "USD", "£": "GBP", "gbp": "GBP"}
+
+
+class Amount(NamedTuple):
+    value: float
+    currency: str
+    # "month", "year", "once" or None when the text does not say
+    period: str | None
+    raw: str
+    # "stipendija" or "iznos" came earlier on the same line
+    after_keyword: bool
+    # lower bound of a range, "od 100 do 200 eura" has value 200 and low 100
+    low: float | None = None
+
+
+class DateMention(NamedTuple):
+    value: date
+    raw: str
+    # "od", "do", "zaključno" ... when the date follows one
+    prep: str | None
+
+
+class Extraction(NamedTuple):
+    amounts: list[Amount]
+    dates: list[DateMention]
+    # "na 10 mjeseci", "u trajanju od 2 godine" ... the first one, in months
+    months: int | None
+
+    @property
+    def start(self) -> DateMention | None:
+        return next((d for d in self.dates if d.prep == "od"), None)
+
+    @property
+    def deadline(self) -> DateMention | None:
+        return next((d for d in self.dates if d.prep not in (None, "od")), None)
+
+    def values(self, low=0, high=float("inf"), currency="EUR", where=None) -> list[float]:
+        """Distinct amounts in `currency` within [low, high], in order of appearance."""
+        seen = []
+        for a in self.amounts:
+            if a.currency == currency and low <= a.value <= high and (where is None or where(a)) \
+                    and a.value not in seen:
+                seen.append(a.value)
+        return seen
+
+
+def to_number(raw: str) -> float:
+    raw = raw.replace("\u00a0", "")
+    if len(raw) > 3 and raw[-3] in ".,":
+        whole, decimals = raw[:-3], raw[-2:]
+    else:
+        whole, decimals = raw, "0"
+    return float(f"{re.sub(r'[.,]', '', whole)}.{decimals}")
+
+
+def currency_code(raw: str) -> str:
+    return CURRENCIES.get(raw.lower()[:3], raw.upper())
+
+
+def period_name(raw: str | None) -> str | None:
+    if raw is None:
+        return None
+    raw = raw.lower()
+    return "month" if "mjese" in raw else "year" if "godi" in raw else "once"
+
+
+def extract(text: str) -> Extraction:
+    amounts, dates, months = [], [], None
+    # whether "stipendija" / "iznos" came earlier on the current line, kept up
+    # to `scanned` so every character is looked at once
+    keyword, scanned = False, 0
+    for m in PATTERN.finditer(text):
+        start = m.start()
+        if m["date"] is not None:
+            try:
+                value = date(int(m["year"]), int(m["month"]), int(m["day"]))
+            except ValueError:
+                continue
+            prep = PREPOSITION.search(text, max(0, start - BEHIND), start)
+            dates.append(DateMention(value, m["date"], prep and prep.group(0).lower().split()[0]))
+            continue
+        if m["length"] is not None:
+            if months is None and DURATION.search(text, max(0, start - BEHIND), start):
+                months = int(m["length"]) * (12 if m["unit"].lower() == "godin" else 1)
+            continue
+
+        line = text.rfind("\n", scanned, start)
+        if line != -1:
+            keyword, scanned = False, line
+        keyword = keyword or KEYWORD.search(text, scanned, start) is not None
+        scanned = start
+
+        if m["range"] is not None:
+            amounts.append(Amount(
+                to_number(m["high"]), currency_code(m["range_currency"]), period_name(m["range_period"]),
+                m["range"], keyword, low=to_number(m["low"])))
+        elif m["amount"] is not None:
+            amounts.append(Amount(
+                to_number(m["amount"]), currency_code(m["currency"]), period_name(m["period"]),
+                m.group(0), keyword))
+        else:
+            amounts.append(Amount(
+                to_number(m["amount_after"]), currency_code(m["currency_first"]),
+                period_name(m["period_after"]), m.group(0), keyword))
+    return Extraction(amounts, dates, months)
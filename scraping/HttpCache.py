@@ -0,0 +1,112 @@
+import os
+import glob
+import json
+import hashlib
+
+
+def code_version():
+    """Hash of the scraping package's sources, a parsed result is only
+    reused by the same parsers that produced it."""
+    digest = hashlib.sha256()
+    for file in sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "*.py"))):
+        with open(file, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+CODE_VERSION = code_version()
+
+
+class HttpCache:
+    """Persistent on-disk cache of fetched pages for conditional requests.
+
+    For every url it keeps the last body together with its ETag,
+    Last-Modified and content hash, plus the result the scraper parsed from
+    it, so an unchanged page is neither downloaded nor parsed again. The
+    parsed result is keyed by CODE_VERSION and the digests of the other
+    urls fetched while parsing (linked PDFs), a change to either of them
+    means parsing again.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv("SCRAPER_CACHE_DIR", ".cache/scraper")
+        os.makedirs(self.path, exist_ok=True)
+        self.hits = 0        # server answered 304 Not Modified
+        self.unchanged = 0   # full response, but same body as last time
+        self.misses = 0      # new or changed page
+
+    def _file(self, url, ext):
+        key = hashlib.sha256(url.encode()).hexdigest()
+        return os.path.join(self.path, f"{key}.{ext}")
+
+    def _write(self, file, data):
+        tmp = f"{file}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, file)
+
+    def _meta(self, url):
+        try:
+            with open(self._file(url, "json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def conditional_headers(self, url):
+        meta = self._meta(url)
+        if not meta or not os.path.exists(self._file(url, "body")):
+            return {}
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def body(self, url):
+        with open(self._file(url, "body"), "rb") as f:
+            return f.read()
+
+    def not_modified(self, url):
+        self.hits += 1
+        return self.body(url)
+
+    def store(self, url, response):
+        """Saves a 200 response, returns False if the body did not change."""
+        meta = self._meta(url) or {}
+        digest = hashlib.sha256(response.content).hexdigest()
+        modified = meta.get("sha256") != digest
+        if modified:
+            self.misses += 1
+            self._write(self._file(url, "body"), response.content)
+            meta = {"url": url, "sha256": digest}
+        else:
+            self.unchanged += 1
+        meta["etag"] = response.headers.get("ETag")
+        meta["last_modified"] = response.headers.get("Last-Modified")
+        self._write(self._file(url, "json"), json.dumps(meta).encode())
+        return modified
+
+    def get_parsed(self, url):
+        """`(parsed, {dependency url: sha256})` saved by this CODE_VERSION, or None."""
+        parsed = (self._meta(url) or {}).get("parsed")
+        if not isinstance(parsed, dict) or parsed.get("version") != CODE_VERSION:
+            return None
+        return parsed["result"], parsed["depends_on"]
+
+    def put_parsed(self, url, parsed, depends_on):
+        meta = self._meta(url)
+        if meta is None:
+            return
+        meta["parsed"] = {"version": CODE_VERSION, "depends_on": depends_on, "result": parsed}
+        self._write(self._file(url, "json"),
+                    json.dumps(meta, ensure_ascii=False).encode())
+
+    def stats(self):
+        total = self.hits + self.unchanged + self.misses
+        return {
+            "hits": self.hits,
+            "unchanged": self.unchanged,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.unchanged) / total if total else 0.0,
+        }
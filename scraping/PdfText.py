@@ -0,0 +1,77 @@
+import io
+import os
+import sys
+import asyncio
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+
+from pypdf import PdfReader
+
+CACHE_DIR = os.getenv("PDF_TEXT_CACHE_DIR", ".cache/pdf-text")
+
+_pool = None
+
+
+def extract_text(content):
+    reader = PdfReader(io.BytesIO(content))
+    return "".join(page.extract_text() for page in reader.pages)
+
+
+def _cache_file(url, content):
+    # the same document under the same url is only ever parsed once
+    key = hashlib.sha256(url.encode() + b"\0" + hashlib.sha256(content).digest())
+    return os.path.join(CACHE_DIR, f"{key.hexdigest()}.txt")
+
+
+def _cached(url, content):
+    try:
+        with open(_cache_file(url, content), encoding="utf-8") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _store(url, content, text):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    file = _cache_file(url, content)
+    with open(f"{file}.tmp", "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(f"{file}.tmp", file)
+
+
+def pdf_text(url, content):
+    text = _cached(url, content)
+    if text is None:
+        text = extract_text(content)
+        _store(url, content, text)
+    return text
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(int(os.getenv("PDF_WORKERS", os.cpu_count() or 1)))
+    return _pool
+
+
+async def pdf_texts_async(pdfs):
+    """Extracts text from `{url: content}` in the process pool, using the cache.
+
+    Downloads that failed (exceptions instead of content) are skipped.
+    """
+    loop = asyncio.get_running_loop()
+
+    async def load(url, content):
+        text = _cached(url, content)
+        if text is None:
+            try:
+                text = await loop.run_in_executor(get_pool(), extract_text, content)
+            except Exception as e:
+                print(f"Greška pri čitanju PDF-a {url}: {e}", file=sys.stderr)
+                return ""
+            _store(url, content, text)
+        return text
+
+    pdfs = {u: c for u, c in pdfs.items() if not isinstance(c, Exception)}
+    texts = await asyncio.gather(*(load(u, c) for u, c in pdfs.items()))
+    return dict(zip(pdfs, texts))
@@ -1,4 +1,12 @@
 import feedparser as fp
+if __package__:
+    from scraping.Extract import extract
+else:
+    from Extract import extract
+
+# scholarships published by the ministry of science and education
+FEED_URL = "https://mzom.gov.hr/rss.aspx?ID=196"
+
 
 class RSSFeedEntry:
     def __init__(self, title, link, guid, description, pubDate):
@@ -42,11 +50,11 @@ class RSSFetcher:
     
     def get_amount_from_link(self, entry):
         # access the link and parse the amount if possible
-        # Returns a dict with keys: amount (float if parseable else raw string), currency (if detected), raw (matched string)
+        # Returns a dict with keys: amount (float if parseable else raw string), currency (if detected), raw (matched string), period (month/year/once if stated)
         try:
             import requests
             from bs4 import BeautifulSoup
-            import re
+            import json
         except Exception:
             # missing dependencies
             return None
@@ -63,12 +71,12 @@ class RSSFetcher:
         except Exception:
             return None
 
+        soup = BeautifulSoup(html, 'html.parser')
+
         # Try to extract JSON-LD price information first
         try:
-            soup = BeautifulSoup(html, 'html.parser')
             for script in soup.find_all('script', type='application/ld+json'):
                 try:
-                    import json
                     data = json.loads(script.string or '')
                 except Exception:
                     continue
@@ -86,99 +94,28 @@ class RSSFetcher:
                             currency = offers[0].get('priceCurrency')
                         if price:
                             try:
-                                return {'amount': float(price), 'currency': currency, 'raw': str(price)}
+                                return {'amount': float(price), 'currency': currency, 'raw': str(price), 'period': None}
                             except Exception:
-                                return {'amount': str(price), 'currency': currency, 'raw': str(price)}
+                                return {'amount': str(price), 'currency': currency, 'raw': str(price), 'period': None}
 
         except Exception:
             pass
 
-        # Fallback: search page text for currency patterns
-        text = BeautifulSoup(html, 'html.parser').get_text(separator=' ', strip=True)
-
-        # Common currency symbols and Croatian/English word forms
-        currency_words = r'(?:€|EUR|euro|eura|kn|kuna|kune|kuni|kunu|HRK|USD|\$|GBP|£)'
-        # number with optional thousands separators and decimals
-        number = r'(?:\d{1,3}(?:[.,\s]\d{3})*(?:[.,]\d+)?|\d+(?:[.,]\d+)?)'
-
-        # 1) Range pattern often seen: "od 500 do 1.500 kn" -> take the upper bound (group2)
-        range_pattern = re.compile(rf'od\s*({number})\s*(?:do|-)\s*({number})\s*(?:{currency_words})', re.IGNORECASE)
-        m = range_pattern.search(text)
-        if m:
-            amt_raw = m.group(2) or m.group(1)
-            raw = m.group(0)
-            currency = None
-            post = text[m.end():m.end()+12]
-            cur_m = re.search(currency_words, post, re.IGNORECASE)
-            if cur_m:
-                currency = cur_m.group(0)
-            try:
-                cleaned = re.sub(r'[\s\u00A0]', '', amt_raw)
-                if cleaned.count(',') and cleaned.count('.'):
-                    cleaned = cleaned.replace('.', '').replace(',', '.')
-                else:
-                    cleaned = cleaned.replace(',', '.')
-                value = float(re.sub(r'[^0-9\.]', '', cleaned))
-                return {'amount': value, 'currency': currency, 'raw': raw}
-            except Exception:
-                return {'amount': amt_raw, 'currency': currency, 'raw': raw}
-
-        # 2) Croatian phrasing patterns: "iznosi 1.500 kn", "u iznosu od 1500 kuna" - allow more gap
-        phrase_pattern = re.compile(rf'(?:u iznosu od|u iznosu|iznosi|iznos|dodijeljen[ao]?|dodijeljeno|najv[iš]e|najviše|do iznosa|do)\s*:?.{{0,80}}?({number})\s*(?:{currency_words})', re.IGNORECASE | re.DOTALL)
-        m = phrase_pattern.search(text)
-        if m:
-            amt_raw = m.group(1)
-            raw = m.group(0)
-            post = text[m.end():m.end()+12]
-            cur_m = re.search(currency_words, post, re.IGNORECASE)
-            currency = cur_m.group(0) if cur_m else None
-            try:
-                cleaned = re.sub(r'[\s\u00A0]', '', amt_raw)
-                if cleaned.count(',') and cleaned.count('.'):
-                    cleaned = cleaned.replace('.', '').replace(',', '.')
-                else:
-                    cleaned = cleaned.replace(',', '.')
-                value = float(re.sub(r'[^0-9\.]', '', cleaned))
-                return {'amount': value, 'currency': currency, 'raw': raw}
-            except Exception:
-                return {'amount': amt_raw, 'currency': currency, 'raw': raw}
-
-        # 3) Generic patterns (amount followed/preceded by currency)
-        pattern = re.compile(rf'({number})\s*(?:{currency_words})|(?:{currency_words})\s*({number})', re.IGNORECASE)
-        m = pattern.search(text)
-        if m:
-            # determine which group matched
-            g1 = m.group(1)
-            g2 = m.group(2) if m.lastindex and m.lastindex >= 2 else None
-            raw = m.group(0)
-            currency = None
-            amt = None
-            if g1:
-                amt = g1
-                post = text[m.end():m.end()+10]
-                cur_m = re.search(currency_words, post, re.IGNORECASE)
-                currency = cur_m.group(0) if cur_m else None
-            elif g2:
-                amt = g2
-                pre = text[max(0, m.start()-10):m.start()]
-                cur_m = re.search(currency_words, pre, re.IGNORECASE)
-                currency = cur_m.group(0) if cur_m else None
-
-            try:
-                cleaned = re.sub(r'[\s\u00A0]', '', amt)
-                if cleaned.count(',') and cleaned.count('.'):
-                    cleaned = cleaned.replace('.', '').replace(',', '.')
-                else:
-                    cleaned = cleaned.replace(',', '.')
-                value = float(re.sub(r'[^0-9\.]', '', cleaned))
-                return {'amount': value, 'currency': currency, 'raw': raw}
-            except Exception:
-                return {'amount': amt, 'currency': currency, 'raw': raw}
+        # Fallback: search page text for amounts, in order of preference
+        # 1) a range "od 500 do 1.500 kn" -> the upper bound
+        # 2) an amount after "iznos" / "stipendija", "iznosi 1.500 kn"
+        # 3) any amount with a currency
+        amounts = extract(soup.get_text(separator=' ', strip=True)).amounts
+        a = (next((a for a in amounts if a.low is not None), None)
+             or next((a for a in amounts if a.after_keyword), None)
+             or next(iter(amounts), None))
+        if a is None:
+            return None
+        return {'amount': a.value, 'currency': a.currency, 'raw': a.raw, 'period': a.period}
 
-        return None
     
 if __name__ == "__main__":
-    fetcher = RSSFetcher("https://mzom.gov.hr/rss.aspx?ID=196")
+    fetcher = RSSFetcher(FEED_URL)
 
     for entry in fetcher.get_scholarships_only():
         print(entry)
@@ -0,0 +1,217 @@
+"""Stored responses of the scraped websites and a local stand-in server.
+
+    python -m scraping.Replay record    # run every scraper against the live sites, save what they fetch
+    python -m scraping.Replay serve     # serve the stored responses, http://127.0.0.1:8765/<quoted url>
+
+The fixtures in benchmarks/fixtures are synthetic: hand-written pages shaped
+like the real ones, some bodies shared by several urls. Until `record` is run
+against the live sites, benchmark numbers say nothing about the real pages.
+
+Inside `routed(server)` every request made through requests, httpx or
+urllib (feedparser) goes to the stand-in instead of the real website, so
+scrapers run unchanged and offline. Used by backend/tests/scraping_bench.py.
+"""
+import os
+import sys
+import json
+import hashlib
+import argparse
+import threading
+import urllib.request
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import quote, unquote
+
+import httpx
+import requests
+
+if __package__:
+    from scraping.Crawler import USER_AGENT
+else:
+    from Crawler import USER_AGENT
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "fixtures")
+EXTENSIONS = {"text/html": "html", "application/pdf": "pdf", "application/rss+xml": "xml",
+              "application/xml": "xml", "text/xml": "xml"}
+
+
+class FixtureStore:
+    """Responses by url: index.json plus one file per distinct body.
+
+    The index keeps status, content type and the ETag / Last-Modified
+    headers, so the stand-in answers conditional requests like the real
+    site would.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv("SCRAPER_FIXTURES_DIR", FIXTURES)
+        self.lock = threading.Lock()
+        try:
+            with open(os.path.join(self.path, "index.json"), encoding="utf-8") as f:
+                self.index = json.load(f)
+        except OSError:
+            self.index = {}
+
+    def get(self, url):
+        """`(meta, body)` recorded for `url`, or None."""
+        meta = self.index.get(url)
+        if meta is None:
+            return None
+        with open(os.path.join(self.path, meta["file"]), "rb") as f:
+            return meta, f.read()
+
+    def put(self, url, body, status=200, content_type="text/html; charset=utf-8", headers=None):
+        kind = content_type.split(";")[0].strip()
+        file = f"{hashlib.sha256(body).hexdigest()[:16]}.{EXTENSIONS.get(kind, 'bin')}"
+        meta = {"file": file, "status": status, "content_type": content_type}
+        meta.update((k, v) for k, v in (headers or {}).items() if k in ("etag", "last-modified"))
+        with self.lock:
+            os.makedirs(self.path, exist_ok=True)
+            with open(os.path.join(self.path, file), "wb") as f:
+                f.write(body)
+            self.index[url] = meta
+            tmp = os.path.join(self.path, "index.json.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.index, f, indent=1, sort_keys=True)
+            os.replace(tmp, os.path.join(self.path, "index.json"))
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        url = unquote(self.path[1:])
+        recorded = server.store.get(url)
+        if recorded is None and server.record:
+            recorded = server.fetch(url)
+        if recorded is None:
+            server.misses.append(url)
+            print(f"replay: no recording of {url}", file=sys.stderr)
+            self.send_error(404)
+            return
+        meta, body = recorded
+        etag = meta.get("etag")
+        if etag and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(meta["status"])
+        self.send_header("Content-Type", meta["content_type"])
+        self.send_header("Content-Length", str(len(body)))
+        for header in ("etag", "last-modified"):
+            if meta.get(header):
+                self.send_header(header, meta[header])
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class ReplayServer(ThreadingHTTPServer):
+    """Serves `store` on 127.0.0.1 at /<quoted original url>.
+
+    With record=True a url missing from the store is fetched from the real
+    website and saved first. Urls that could not be answered are collected
+    in `misses`.
+    """
+    daemon_threads = True
+
+    def __init__(self, store=None, record=False, port=0):
+        super().__init__(("127.0.0.1", port), ReplayHandler)
+        self.store = store or FixtureStore()
+        self.record = record
+        self.misses = []
+        self.url = f"http://127.0.0.1:{self.server_address[1]}"
+        self.thread = None
+
+    def route(self, url):
+        if url.startswith(self.url):
+            return url
+        return f"{self.url}/{quote(url, safe='')}"
+
+    def fetch(self, url):
+        # sync httpx, the async transport, requests and urllib are routed here
+        try:
+            response = httpx.get(url, headers={"User-Agent": USER_AGENT},
+                                 follow_redirects=True, timeout=30)
+        except httpx.HTTPError as e:
+            print(f"replay: recording {url} failed: {e}", file=sys.stderr)
+            return None
+        self.store.put(url, response.content, response.status_code,
+                       response.headers.get("content-type", "application/octet-stream"),
+                       {k.lower(): v for k, v in response.headers.items()})
+        return self.store.get(url)
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+
+@contextmanager
+def routed(server):
+    """Sends every request made through requests, httpx's async client and
+    urllib (feedparser) to `server` instead of the real website."""
+    send = requests.adapters.HTTPAdapter.send
+    handle = httpx.AsyncHTTPTransport.handle_async_request
+    open_url = urllib.request.OpenerDirector.open
+
+    def send_routed(adapter, request, *args, **kwargs):
+        request.url = server.route(request.url)
+        return send(adapter, request, *args, **kwargs)
+
+    async def handle_routed(transport, request):
+        request.url = httpx.URL(server.route(str(request.url)))
+        return await handle(transport, request)
+
+    def open_routed(opener, request, *args, **kwargs):
+        if isinstance(request, str):
+            request = server.route(request)
+        else:
+            request.full_url = server.route(request.full_url)
+        return open_url(opener, request, *args, **kwargs)
+
+    requests.adapters.HTTPAdapter.send = send_routed
+    httpx.AsyncHTTPTransport.handle_async_request = handle_routed
+    urllib.request.OpenerDirector.open = open_routed
+    try:
+        yield server
+    finally:
+        requests.adapters.HTTPAdapter.send = send
+        httpx.AsyncHTTPTransport.handle_async_request = handle
+        urllib.request.OpenerDirector.open = open_url
+
+
+def record():
+    """Runs what the benchmarks run, live, keeping every response."""
+    import glob
+    import importlib
+    from scraping.RSSFetcher import RSSFetcher, FEED_URL
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with ReplayServer(record=True) as server, routed(server):
+        for f in sorted(glob.glob(os.path.join(root, "scraping", "*Scraper.py"))):
+            module = importlib.import_module(f"scraping.{os.path.basename(f).removesuffix('.py')}")
+            if not hasattr(module, "scrape"):
+                continue
+            print(f"{module.__name__}: {len(module.scrape())} scholarships", file=sys.stderr)
+        print(f"rss: {len(RSSFetcher(FEED_URL).fetch())} entries", file=sys.stderr)
+    print(f"{len(server.store.index)} responses in {server.store.path}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", choices=["record", "serve"])
+    parser.add_argument("--port", type=int, default=8765, help="port for serve")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record()
+    else:
+        with ReplayServer(port=args.port) as server:
+            print(f"serving {len(server.store.index)} responses on {server.url}", file=sys.stderr)
+            server.thread.join()
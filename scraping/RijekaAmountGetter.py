@@ -1,16 +1,12 @@
-import requests
-from bs4 import BeautifulSoup
+if __package__:
+    from scraping.BaseScraper import BaseScraper, TagStrainer, memoized
+else:
+    from BaseScraper import BaseScraper, TagStrainer, memoized
 
-class RijekaIznosiScraper:
-    def __init__(self, url):
-        self.url = url
-        self.soup = self.get_soup()
-
-    def get_soup(self):
-        response = requests.get(self.url)
-        response.encoding = "utf-8"
-        return BeautifulSoup(response.text, "html.parser")
+class RijekaIznosiScraper(BaseScraper):
+    parse_only = TagStrainer(("div", "user-content"))
 
+    @memoized
     def get_stipendije(self):
         div = self.soup.find("div", class_="user-content")
         if not div:
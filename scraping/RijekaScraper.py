@@ -1,34 +1,30 @@
 import sys
-import requests
-from bs4 import BeautifulSoup
 import re
 
 if __name__ == "__main__":
     from RijekaUrlGetter import RijekaUrlGetter
     from RijekaAmountGetter import RijekaIznosiScraper
+    from BaseScraper import BaseScraper, TagStrainer, memoized, parse
 else:
     from scraping.RijekaUrlGetter import RijekaUrlGetter
     from scraping.RijekaAmountGetter import RijekaIznosiScraper
+    from scraping.BaseScraper import BaseScraper, TagStrainer, memoized, parse
 
 
-class RijekaScraper:
-    def __init__(self, url):
-        self.url = url
-        self.soup = self.get_soup()
-
-    def get_soup(self):
-        response = requests.get(self.url)
-        response.encoding = "utf-8"
-        return BeautifulSoup(response.text, 'html.parser')
+class RijekaScraper(BaseScraper):
+    parse_only = TagStrainer("h1", ("div", "page-title"), ("div", "user-content"))
 
+    @memoized
     def get_title(self):
         h1 = self.soup.find('h1')
         return h1.get_text(strip=True) if h1 else None
 
+    @memoized
     def get_details(self):
         div = self.soup.find('div', class_='user-content')
         return div.get_text(separator=" ", strip=True) if div else ""
 
+    @memoized
     def get_lists(self):
         div = self.soup.find('div', class_='user-content')
         if not div:
@@ -40,7 +36,7 @@ class RijekaScraper:
         if cutoff_match:
             html_str = html_str[:cutoff_match.start()]
 
-        partial_soup = BeautifulSoup(html_str, 'html.parser')
+        partial_soup = parse(html_str)
         all_conditions = []
 
         for element in partial_soup.find_all(['ul']):
@@ -58,6 +54,7 @@ class RijekaScraper:
 
         return all_conditions
 
+    @memoized
     def get_page_title(self):
         title_div = self.soup.find('div', class_='page-title')
         if title_div:
@@ -66,6 +63,7 @@ class RijekaScraper:
                 return h1.get_text(strip=True)
         return None
 
+    @memoized
     def get_categories(self):
         text = self.get_details().lower()
         categories = []
@@ -75,11 +73,10 @@ class RijekaScraper:
             categories.append("studenti")
         return categories
 
+    @memoized
     def get_durations(self):
-        text = self.get_details()
-        pattern = r"razdoblje od\s+(\d+)\s+mjesec"
-        match = re.search(pattern, text, flags=re.IGNORECASE)
-        return match.group(1) if match else None
+        months = self.get_extracted().months
+        return str(months) if months is not None else None
 
     def get_all(self):
         return {
@@ -94,6 +91,7 @@ class RijekaScraper:
             "location": "Rijeka"
         }
 
+    @memoized
     def get_matching_iznos_text(self):
         page_title = self.get_page_title()
         if not page_title:
@@ -153,5 +151,12 @@ def scrape():
     return out
 
 
+async def scrape_async(crawler):
+    url = "https://www.rijeka.hr/teme-za-gradane/odgoj-i-obrazovanje/stipendije/"
+    links = RijekaUrlGetter(url, await crawler.get_text(url)).get_links()
+    return await crawler.scrape_pages(
+        links, lambda l, html: RijekaScraper(l, html).get_all())
+
+
 if __name__ == "__main__":
     print(scrape())
@@ -1,17 +1,13 @@
 
-import requests
-from bs4 import BeautifulSoup
+if __package__:
+    from scraping.BaseScraper import BaseScraper, TagStrainer, memoized
+else:
+    from BaseScraper import BaseScraper, TagStrainer, memoized
 
-class RijekaUrlGetter:
-    def __init__(self, url):
-        self.url = url
-        self.soup = self.get_soup()
-        
-    def get_soup(self):
-        response = requests.get(self.url)
-        response.encoding = "utf-8"
-        return BeautifulSoup(response.text, 'html.parser')
-    
+class RijekaUrlGetter(BaseScraper):
+    parse_only = TagStrainer("a")
+
+    @memoized
     def get_links(self):
         links = []
         for a in self.soup.find_all("a", href=True):
@@ -1,25 +1,29 @@
 import sys
+import asyncio
 import requests
-from bs4 import BeautifulSoup
-import re
 if __name__ == "__main__":
     from SibenikUrlGetter import SibenikUrlGetter
+    from BaseScraper import BaseScraper, memoized
+    from Extract import extract
+    import PdfText
 else:
     from scraping.SibenikUrlGetter import SibenikUrlGetter
-from pypdf import PdfReader
-import io
+    from scraping.BaseScraper import BaseScraper, memoized
+    from scraping.Extract import extract
+    import scraping.PdfText as PdfText
 
 
-class SibenikScraper:
-    def __init__(self, url):
-        self.url = url
-        self.soup = self.get_soup()
+def is_scholarship_amount(amount):
+    # "Iznos stipendije je 150 EUR", "100 EUR mjesečno", not fees or totals
+    return amount.after_keyword or amount.period is not None
 
-    def get_soup(self):
-        response = requests.get(self.url)
-        response.encoding = "utf-8"
-        return BeautifulSoup(response.text, 'html.parser')
 
+class SibenikScraper(BaseScraper):
+    def __init__(self, url, html=None):
+        self.pdf_texts = {}
+        super().__init__(url, html)
+
+    @memoized
     def get_title(self):
         title = self.soup.find('h3', class_='font-weight-bold text-uppercase')
         if title:
@@ -35,6 +39,7 @@ class SibenikScraper:
 
         return None
 
+    @memoized
     def get_status(self):
         status_div = self.soup.find('div', class_='card-body')
         if status_div:
@@ -46,34 +51,32 @@ class SibenikScraper:
                 return status_text.get_text(strip=True)
         return None
 
+    @memoized
     def get_date_range(self):
         dates = {}
 
-        date_objave = self.soup.find('div', class_='card-body border-bottom')
-        if date_objave and 'Datum objave' in date_objave.get_text():
-            date_text = date_objave.find('b')
+        cards = self.soup.find_all('div', class_='card-body border-bottom')
+        if cards and 'Datum objave' in cards[0].get_text():
+            date_text = cards[0].find('b')
             if date_text:
                 dates['datum_objave'] = date_text.get_text(
                     strip=True).replace("h", "").strip()
 
-        date_isteka = self.soup.find_all(
-            'div', class_='card-body border-bottom')
-        for div in date_isteka:
+        for div in cards:
             if 'Datum isteka' in div.get_text():
                 date_text = div.find('b')
                 if date_text:
                     dates['datum_isteka'] = date_text.get_text(
                         strip=True).replace("h", "").strip()
 
-        text = self.soup.get_text().replace("h", "")
-        date_pattern = r"od\s+(\d{1,2}\.\d{1,2}\.\d{4}).*?do\s+(\d{1,2}\.\d{1,2}\.\d{4})"
-        match = re.search(date_pattern, text, re.IGNORECASE)
-        if match:
-            dates['od'] = match.group(1)
-            dates['do'] = match.group(2)
+        extracted = extract(self.get_text())
+        if extracted.start and extracted.deadline:
+            dates['od'] = extracted.start.raw
+            dates['do'] = extracted.deadline.raw
 
         return dates if dates else None
 
+    @memoized
     def get_details(self):
         details_divs = self.soup.find_all('div', class_='card-body')
         all_text = []
@@ -87,6 +90,7 @@ class SibenikScraper:
 
         return "\n\n".join(all_text) if all_text else ""
 
+    @memoized
     def get_pdf_links(self):
         pdf_links = []
 
@@ -113,77 +117,35 @@ class SibenikScraper:
         return pdf_links
 
     def extract_text_from_pdf(self, pdf_url):
+        if pdf_url in self.pdf_texts:
+            return self.pdf_texts[pdf_url]
         try:
             response = requests.get(pdf_url, timeout=30)
             response.raise_for_status()
-
-            pdf_file = io.BytesIO(response.content)
-            pdf_reader = PdfReader(pdf_file)
-
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text()
-
-            return text
+            text = PdfText.pdf_text(pdf_url, response.content)
         except Exception as e:
             print(f"Greška pri čitanju PDF-a {pdf_url}: {e}")
-            return ""
+            text = ""
+        self.pdf_texts[pdf_url] = text
+        return text
 
+    @memoized
     def get_amounts_from_pdf(self):
-        pdf_links = self.get_pdf_links()
         all_amounts = []
-
-        for pdf_link in pdf_links:
+        for pdf_link in self.get_pdf_links():
             pdf_text = self.extract_text_from_pdf(pdf_link)
             if pdf_text:
-                amount_patterns = [
-                    r"(?:stipendij[ae]|iznos).*?(\d{1,4}[.,]\d{2})\s*(?:EUR|eura|€)",
-                    r"(?:stipendij[ae]|iznos).*?(\d{1,4})\s*(?:EUR|eura|€)",
-                    r"(\d{1,4}[.,]\d{2})\s*(?:EUR|eura|€)\s*(?:mjesečno|godišnje)",
-                    r"(\d{1,4})\s*(?:EUR|eura|€)\s*(?:mjesečno|godišnje)",
-                ]
-
-                for pattern in amount_patterns:
-                    matches = re.findall(pattern, pdf_text, re.IGNORECASE)
-                    for match in matches:
-                        normalized = match.replace(',', '.')
-                        try:
-                            amount = float(normalized)
-                            if amount not in all_amounts and 80 <= amount <= 600:
-                                all_amounts.append(amount)
-                        except ValueError:
-                            continue
-
-        return sorted(list(set(all_amounts)))
-
-    def get_amounts(self):
-        pdf_amounts = self.get_amounts_from_pdf()
-        if pdf_amounts:
-            return [f"{int(amt)}" if amt == int(amt) else f"{amt:.2f}" for amt in pdf_amounts]
+                all_amounts += extract(pdf_text).values(80, 600, where=is_scholarship_amount)
 
-        details = self.get_details()
+        return sorted(set(all_amounts))
 
-        amount_patterns = [
-            r"(?:stipendij[ae]|iznos).*?(\d{2,3}[.,]\d{2})\s*(?:EUR|eura|€)",
-            r"(?:stipendij[ae]|iznos).*?(\d{2,3})\s*(?:EUR|eura|€)",
-            r"(\d{2,3}[.,]\d{2})\s*(?:EUR|eura|€)\s*(?:mjesečno|godišnje)",
-            r"(\d{2,3})\s*(?:EUR|eura|€)\s*(?:mjesečno|godišnje)",
-        ]
-
-        all_amounts = []
-        for pattern in amount_patterns:
-            matches = re.findall(pattern, details, flags=re.IGNORECASE)
-            for match in matches:
-                normalized = match.replace(',', '.')
-                try:
-                    amount = float(normalized)
-                    if 80 <= amount <= 600 and amount not in all_amounts:
-                        all_amounts.append(amount)
-                except ValueError:
-                    continue
-
-        return [int(amt) for amt in all_amounts]
+    @memoized
+    def get_amounts(self):
+        amounts = (self.get_amounts_from_pdf()
+                   or self.get_extracted().values(80, 600, where=is_scholarship_amount))
+        return [int(amt) if amt == int(amt) else amt for amt in amounts]
 
+    @memoized
     def get_categories(self):
         text = (self.get_title() + " " + self.get_details()).lower()
         categories = []
@@ -195,6 +157,7 @@ class SibenikScraper:
             categories.append("sportaši")
         return categories if categories else ["studenti"]
 
+    @memoized
     def get_short_details(self):
         cats = self.get_categories()
         dates = self.get_date_range()
@@ -270,6 +233,19 @@ def scrape():
     return out
 
 
+async def scrape_async(crawler):
+    url = "https://gov.sibenik.hr/stranice/stipendije/135.html"
+    links = SibenikUrlGetter(url, await crawler.get_text(url)).get_links()
+
+    async def parse(l, html):
+        scraper = await asyncio.to_thread(SibenikScraper, l, html)
+        pdfs = await crawler.get_many(scraper.get_pdf_links(), binary=True)
+        scraper.pdf_texts = await PdfText.pdf_texts_async(pdfs)
+        return await asyncio.to_thread(scraper.get_all)
+
+    return await crawler.scrape_pages(links, parse)
+
+
 if __name__ == "__main__":
     print(scrape())
     url = "https://gov.sibenik.hr/stranice/stipendije/135.html"
@@ -1,26 +1,25 @@
 import sys
+import asyncio
 import requests
-from bs4 import BeautifulSoup
-import re
 
 if __name__ == "__main__":
     from SplitUrlGetter import SplitUrlGetter
+    from BaseScraper import BaseScraper, memoized
+    from Extract import extract
+    import PdfText
 else:
     from scraping.SplitUrlGetter import SplitUrlGetter
-from pypdf import PdfReader
-import io
+    from scraping.BaseScraper import BaseScraper, memoized
+    from scraping.Extract import extract
+    import scraping.PdfText as PdfText
 
 
-class SplitScraper:
-    def __init__(self, url):
-        self.url = url
-        self.soup = self.get_soup()
-
-    def get_soup(self):
-        response = requests.get(self.url)
-        response.encoding = "utf-8"
-        return BeautifulSoup(response.text, 'html.parser')
+class SplitScraper(BaseScraper):
+    def __init__(self, url, html=None):
+        self.pdf_texts = {}
+        super().__init__(url, html)
 
+    @memoized
     def get_title(self):
         # Traži h1 naslov
         h1 = self.soup.find('h1')
@@ -34,6 +33,7 @@ class SplitScraper:
 
         return None
 
+    @memoized
     def get_date(self):
         # Traži div sa klasom 'prijave' koji sadrži datum
         prijave_div = self.soup.find('div', class_='prijave')
@@ -43,15 +43,11 @@ class SplitScraper:
             if date_tag:
                 return date_tag.get_text(strip=True)
 
-        # Alternativni pattern - traži u cijelom tekstu
-        text = self.soup.get_text()
-        date_pattern = r"Prijave na natječaj traju od\s+(\d{1,2}\.\d{1,2}\.\d{4})"
-        match = re.search(date_pattern, text, re.IGNORECASE)
-        if match:
-            return match.group(1)
-
-        return None
+        # Alternativa: prvi datum "od ..." u cijelom tekstu ("Prijave traju od 20.10.2025.")
+        start = extract(self.get_text()).start
+        return start.raw if start else None
 
+    @memoized
     def get_details(self):
         # Traži glavni sadržaj natječaja
         details_div = self.soup.find('div', class_='user-content')
@@ -69,6 +65,7 @@ class SplitScraper:
 
         return ""
 
+    @memoized
     def get_pdf_links(self):
         """Dohvaća sve PDF linkove sa stranice"""
         pdf_links = []
@@ -88,54 +85,33 @@ class SplitScraper:
         return pdf_links
 
     def extract_text_from_pdf(self, pdf_url):
-        """Preuzima PDF i izvlači tekst"""
+        """Preuzima PDF i izvlači tekst (jednom po dokumentu)"""
+        if pdf_url in self.pdf_texts:
+            return self.pdf_texts[pdf_url]
         try:
             response = requests.get(pdf_url, timeout=30)
             response.raise_for_status()
-
-            pdf_file = io.BytesIO(response.content)
-            pdf_reader = PdfReader(pdf_file)
-
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text()
-
-            return text
+            text = PdfText.pdf_text(pdf_url, response.content)
         except Exception as e:
             print(f"Greška pri čitanju PDF-a {pdf_url}: {e}")
-            return ""
+            text = ""
+        self.pdf_texts[pdf_url] = text
+        return text
 
+    @memoized
     def get_amounts_from_pdf(self):
         """Dohvaća iznose stipendija iz PDF dokumenata"""
-        pdf_links = self.get_pdf_links()
         all_amounts = []
-
-        for pdf_link in pdf_links:
+        for pdf_link in self.get_pdf_links():
             pdf_text = self.extract_text_from_pdf(pdf_link)
             if pdf_text:
-                # Pattern za iznose: traži EUR ili eura sa brojevima
-                # Primjer: "150,00 EUR", "200 EUR", "150.00 eura"
-                amount_patterns = [
-                    r"(\d{1,4}[.,]\d{2})\s*(?:EUR|eura)",  # 150,00 EUR
-                    r"(\d{1,4})\s*(?:EUR|eura)",            # 150 EUR
-                    r"(\d{1,4}[.,]\d{2})\s*€",              # 150,00 €
-                ]
-
-                for pattern in amount_patterns:
-                    matches = re.findall(pattern, pdf_text, re.IGNORECASE)
-                    for match in matches:
-                        # Normaliziraj broj (zamijeni zarez sa točkom)
-                        normalized = match.replace(',', '.')
-                        try:
-                            amount = float(normalized)
-                            if amount not in all_amounts and 50 <= amount <= 1000:  # Filtriraj realne iznose
-                                all_amounts.append(amount)
-                        except ValueError:
-                            continue
+                # Filtriraj realne iznose
+                all_amounts += extract(pdf_text).values(50, 1000)
 
         # Vrati sortirane jedinstvene iznose
-        return sorted(list(set(all_amounts)))
+        return sorted(set(all_amounts))
 
+    @memoized
     def get_categories(self):
         text = self.get_details().lower()
         categories = []
@@ -147,23 +123,16 @@ class SplitScraper:
             categories.append("sportaši")
         return categories
 
+    @memoized
     def get_amounts(self):
-        # Prvo pokušaj iz PDF-a
-        pdf_amounts = self.get_amounts_from_pdf()
-        if pdf_amounts:
-            return [str(int(amt)) if amt == int(amt) else str(amt) for amt in pdf_amounts]
-
-        # Ako nema PDF-a, traži na stranici
-        details = self.get_details()
-        amount_pattern = r"(\d{2,3}(?:[.,]\d{2})?)\s*(?:eura|€|EUR)"
-        amounts = re.findall(amount_pattern, details, flags=re.IGNORECASE)
-        return [int(a) for a in amounts]
+        # Prvo pokušaj iz PDF-a, ako nema PDF-a, traži na stranici
+        amounts = self.get_amounts_from_pdf() or self.get_extracted().values(10, 999)
+        return [int(amt) if amt == int(amt) else amt for amt in amounts]
 
+    @memoized
     def get_durations(self):
-        details = self.get_details()
-        duration_pattern = r"(?:na|traje|razdoblje od)\s+(\d+)\s+mjesec"
-        match = re.search(duration_pattern, details, flags=re.IGNORECASE)
-        return match.group(1) if match else None
+        months = self.get_extracted().months
+        return str(months) if months is not None else None
 
     def get_all(self):
         return {
@@ -213,6 +182,19 @@ def scrape():
     return out
 
 
+async def scrape_async(crawler):
+    url = "https://split.hr/natjecaji-i-oglasi/pid/5936/searchid/5937/cfs/true/edncfddlnc_55/1222"
+    links = SplitUrlGetter(url, await crawler.get_text(url)).get_links()
+
+    async def parse(l, html):
+        scraper = await asyncio.to_thread(SplitScraper, l, html)
+        pdfs = await crawler.get_many(scraper.get_pdf_links(), binary=True)
+        scraper.pdf_texts = await PdfText.pdf_texts_async(pdfs)
+        return await asyncio.to_thread(scraper.get_all)
+
+    return await crawler.scrape_pages(links, parse)
+
+
 if __name__ == "__main__":
     # URL sa listom natječaja za stipendiranje
     url = "https://split.hr/natjecaji-i-oglasi/pid/5936/searchid/5937/cfs/true/edncfddlnc_55/1222"
@@ -1,16 +1,12 @@
-import requests
-from bs4 import BeautifulSoup
+if __package__:
+    from scraping.BaseScraper import BaseScraper, TagStrainer, memoized
+else:
+    from BaseScraper import BaseScraper, TagStrainer, memoized
 
-class SplitUrlGetter:
-    def __init__(self, url):
-        self.url = url
-        self.soup = self.get_soup()
-        
-    def get_soup(self):
-        response = requests.get(self.url)
-        response.encoding = "utf-8"
-        return BeautifulSoup(response.text, 'html.parser')
-    
+class SplitUrlGetter(BaseScraper):
+    parse_only = TagStrainer(("article", "l-item"))
+
+    @memoized
     def get_links(self):
         links = []
         # Traži sve article elemente koji sadrže natječaje
@@ -1,47 +1,42 @@
 import sys
-import requests
-from bs4 import BeautifulSoup
-import re
 if __name__ == "__main__":
     import ZagrebUrlGetter as Zg
+    from BaseScraper import BaseScraper, TagStrainer, memoized
 else:
     import scraping.ZagrebUrlGetter as Zg
+    from scraping.BaseScraper import BaseScraper, TagStrainer, memoized
 
 
-class ZagrebScraper:
-    def __init__(self, url):
-        self.url = url
-        self.soup = self.get_soup()
-
-    def get_soup(self):
-        response = requests.get(self.url)
-        response.encoding = "utf-8"
-        return BeautifulSoup(response.text, 'html.parser')
+class ZagrebScraper(BaseScraper):
+    parse_only = TagStrainer("h1", ("div", "datum"), ("div", "opis"))
 
+    @memoized
     def get_title(self):
         return self.soup.find('h1').get_text(strip=True)
 
+    @memoized
     def get_date(self):
         date_div = self.soup.find('div', class_='datum')
         return date_div.get_text(strip=True) if date_div else None
 
+    @memoized
     def get_details(self):
         details_div = self.soup.find('div', class_='opis')
         return details_div.get_text(separator=" ", strip=True) if details_div else ""
 
+    @memoized
     def get_details_div(self):
         return self.soup.find('div', class_='opis')
 
+    @memoized
     def get_amount(self):
-        details = self.get_details()
-        amount_pattern = r"(\d{2,3}(?:[.,]\d{2})?)\s*eura"
-        return max([int(float(x.replace(",", "."))) for x in re.findall(amount_pattern, details, flags=re.IGNORECASE)] + [0])
+        # monthly amounts have two or three digits, larger ones are totals
+        return int(max(self.get_extracted().values(10, 999) + [0]))
 
+    @memoized
     def get_durations(self):
-        details = self.get_details()
-        duration_pattern = r"(?:na|traje)\s+(\d+)\s+mjesec"
-        match = re.search(duration_pattern, details, flags=re.IGNORECASE)
-        return match.group(1) if match else None
+        months = self.get_extracted().months
+        return str(months) if months is not None else None
 
     def get_all(self):
         title = self.get_title()
@@ -76,6 +71,13 @@ def scrape():
     return out
 
 
+async def scrape_async(crawler):
+    url = "https://zagreb.hr/stipendije-grada-zagreba/175198"
+    links = Zg.ZagrebUrlGetter(url, await crawler.get_text(url)).get_links()
+    return await crawler.scrape_pages(
+        links, lambda l, html: ZagrebScraper(l, html).get_all())
+
+
 if __name__ == "__main__":
     url = "https://zagreb.hr/stipendije-grada-zagreba/175198"
     url_getter = Zg.ZagrebUrlGetter(url)
@@ -0,0 +1,74 @@
+"""Amount/date/duration extraction time per page, per-scraper regexes vs Extract.
+
+    python scraping/benchmarks/bench_extract.py [-n 200]
+
+Uses the text of the saved pages in benchmarks/pages. "regex" runs the
+patterns the scrapers used before Extract, each as its own pass over the
+text (compiled through the re module cache, as they were), "extract" is the
+single pass of scraping.Extract.extract() that replaced them.
+"""
+import os
+import re
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from scraping.BaseScraper import BaseScraper
+from scraping.Extract import extract
+
+PAGES = os.path.join(os.path.dirname(__file__), "pages")
+
+# the scrapers' patterns before Extract, amounts first
+AMOUNT_PATTERNS = [
+    r"(\d{2,3}(?:[.,]\d{2})?)\s*eura",
+    r"(\d{2,3}(?:[.,]\d{2})?)\s*(?:eura|€|EUR)",
+    r"(\d{1,4}[.,]\d{2})\s*(?:EUR|eura)",
+    r"(\d{1,4})\s*(?:EUR|eura)",
+    r"(\d{1,4}[.,]\d{2})\s*€",
+    r"(?:stipendij[ae]|iznos).*?(\d{2,3}[.,]\d{2})\s*(?:EUR|eura|€)",
+    r"(?:stipendij[ae]|iznos).*?(\d{2,3})\s*(?:EUR|eura|€)",
+    r"(\d{2,3}[.,]\d{2})\s*(?:EUR|eura|€)\s*(?:mjesečno|godišnje)",
+    r"(\d{2,3})\s*(?:EUR|eura|€)\s*(?:mjesečno|godišnje)",
+]
+SEARCH_PATTERNS = [
+    r"(?:na|traje)\s+(\d+)\s+mjesec",
+    r"razdoblje od\s+(\d+)\s+mjesec",
+    r"(?:na|traje|razdoblje od)\s+(\d+)\s+mjesec",
+    r"Prijave na natječaj traju od\s+(\d{1,2}\.\d{1,2}\.\d{4})",
+    r"od\s+(\d{1,2}\.\d{1,2}\.\d{4}).*?do\s+(\d{1,2}\.\d{1,2}\.\d{4})",
+]
+
+
+def regexes(text):
+    amounts = []
+    for pattern in AMOUNT_PATTERNS:
+        for match in re.findall(pattern, text, re.IGNORECASE):
+            amounts.append(float(match.replace(",", ".")))
+    return amounts, [re.search(pattern, text, re.IGNORECASE) for pattern in SEARCH_PATTERNS]
+
+
+def timed(fn, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n * 1000
+
+
+def page_text(name):
+    with open(os.path.join(PAGES, name), encoding="utf-8") as f:
+        return BaseScraper(f"https://example.com/{name}", f.read()).get_text()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", type=int, default=200, help="iterations per page")
+    args = parser.parse_args()
+
+    print(f"{'page':<10}{'chars':>8}{'regex ms':>10}{'extract ms':>12}{'speedup':>10}")
+    for name in sorted(os.listdir(PAGES)):
+        text = page_text(name)
+        before = timed(lambda: regexes(text), args.n)
+        after = timed(lambda: extract(text), args.n)
+        print(f"{name.removesuffix('.html'):<10}{len(text):>8}{before:>10.3f}{after:>12.3f}{before / after:>9.1f}x")
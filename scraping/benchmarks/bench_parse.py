@@ -0,0 +1,66 @@
+"""Parse time per page with and without memoized scraper fields.
+
+    python scraping/benchmarks/bench_parse.py [-n 50]
+
+Uses the saved pages in benchmarks/pages, so no network is needed. "build"
+is BeautifulSoup parsing the page, "fields" is get_all() on an already
+parsed page, which is what the memoization in BaseScraper speeds up.
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from scraping.BaseScraper import BaseScraper
+from scraping.ZagrebScraper import ZagrebScraper
+from scraping.RijekaScraper import RijekaScraper
+from scraping.SibenikScraper import SibenikScraper
+from scraping.SplitScraper import SplitScraper
+
+PAGES = os.path.join(os.path.dirname(__file__), "pages")
+SCRAPERS = {
+    "zagreb": ZagrebScraper,
+    "rijeka": RijekaScraper,
+    "sibenik": SibenikScraper,
+    "split": SplitScraper,
+}
+
+
+def timed(fn, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n * 1000
+
+
+def bench(name, scraper_class, n):
+    with open(os.path.join(PAGES, f"{name}.html"), encoding="utf-8") as f:
+        html = f.read()
+    url = f"https://example.com/{name}"
+    build = timed(lambda: scraper_class(url, html), n)
+
+    scraper = scraper_class(url, html)
+
+    def fields():
+        scraper._memo.clear()
+        scraper.get_all()
+
+    result = {}
+    for memoize in (False, True):
+        BaseScraper.memoize = memoize
+        result[memoize] = timed(fields, n)
+    BaseScraper.memoize = True
+    return build, result[False], result[True]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", type=int, default=50, help="iterations per page")
+    args = parser.parse_args()
+
+    print(f"{'page':<10}{'build ms':>10}{'fields ms':>12}{'memoized ms':>14}{'speedup':>10}")
+    for name, scraper_class in SCRAPERS.items():
+        build, before, after = bench(name, scraper_class, args.n)
+        print(f"{name:<10}{build:>10.2f}{before:>12.2f}{after:>14.2f}{before / after:>9.1f}x")
@@ -0,0 +1,72 @@
+"""Parse time and memory per page for each parser, whole page vs parse_only.
+
+    python scraping/benchmarks/bench_soup.py [-n 20]
+
+Uses the saved pages in benchmarks/pages. "KB" is what the finished tree
+keeps allocated (tracemalloc), which is what the process RSS grows by for
+every page held in memory. "only" parses with the scraper's parse_only
+TagStrainer, pages whose scraper reads the whole text have none.
+"""
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+from importlib.util import find_spec
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from bs4 import BeautifulSoup
+
+from scraping.ZagrebScraper import ZagrebScraper
+from scraping.RijekaScraper import RijekaScraper
+from scraping.SibenikScraper import SibenikScraper
+from scraping.SplitScraper import SplitScraper
+
+PAGES = os.path.join(os.path.dirname(__file__), "pages")
+SCRAPERS = {
+    "zagreb": ZagrebScraper,
+    "rijeka": RijekaScraper,
+    "sibenik": SibenikScraper,
+    "split": SplitScraper,
+}
+PARSERS = [parser for parser, module in [("html.parser", "html"), ("lxml", "lxml"), ("html5lib", "html5lib")]
+           if find_spec(module)]
+
+
+def timed(fn, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n * 1000
+
+
+def kept(fn):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    soup = fn()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del soup
+    return size / 1024
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", type=int, default=20, help="iterations per page and parser")
+    args = parser.parse_args()
+
+    print(f"{'page':<10}{'parser':<13}{'whole ms':>10}{'KB':>8}{'only ms':>10}{'KB':>8}")
+    for name, scraper_class in SCRAPERS.items():
+        with open(os.path.join(PAGES, f"{name}.html"), encoding="utf-8") as f:
+            html = f.read()
+        for features in PARSERS:
+            whole = lambda: BeautifulSoup(html, features)
+            row = f"{name:<10}{features:<13}{timed(whole, args.n):>10.2f}{kept(whole):>8.0f}"
+            # html5lib always builds the whole tree
+            if scraper_class.parse_only is not None and features != "html5lib":
+                only = lambda: BeautifulSoup(html, features, parse_only=scraper_class.parse_only)
+                row += f"{timed(only, args.n):>10.2f}{kept(only):>8.0f}"
+            else:
+                row += f"{'-':>10}{'-':>8}"
+            print(row)